@@ -1,89 +1,424 @@
 from browser.playwright_tools import PlaywrightBrowser
+from utils.metrics import ACTION_SECONDS, STEPS_TOTAL, STEP_RETRIES
+from utils.logger import get_logger, log_context, truncate_payload
 import asyncio
+import logging
+import operator
+import re
+import time
 
-async def execute_plan_async(plan: list) -> dict:
-    """Execute the test plan using Playwright (async)"""
+logger = get_logger(__name__)
+
+# Per-action retry policy. max_attempts includes the first try; the delay
+# before retry n is backoff * backoff_factor ** (n - 1) seconds. Steps are
+# not retried unless enabled through resolve_retry_policies.
+DEFAULT_RETRY_POLICIES = {
+    'navigate': {'max_attempts': 1, 'backoff': 1.0, 'backoff_factor': 2.0},
+    'click': {'max_attempts': 1, 'backoff': 0.5, 'backoff_factor': 2.0},
+    'type': {'max_attempts': 1, 'backoff': 0.5, 'backoff_factor': 2.0},
+    'extract': {'max_attempts': 1, 'backoff': 0.5, 'backoff_factor': 2.0},
+    'wait': {'max_attempts': 1, 'backoff': 0.0, 'backoff_factor': 1.0},
+    'crawl': {'max_attempts': 1, 'backoff': 0.0, 'backoff_factor': 1.0},
+    'assert_perf': {'max_attempts': 1, 'backoff': 0.0, 'backoff_factor': 1.0},
+}
+NO_RETRY = {'max_attempts': 1, 'backoff': 0.0, 'backoff_factor': 1.0}
+
+# Attempts per action with retries switched on (retry=True / --retry)
+RETRY_ATTEMPTS = {'navigate': 2, 'click': 3, 'type': 2, 'extract': 2}
+
+def resolve_retry_policies(overrides: dict = None, max_attempts: int = None, retry: bool = False) -> dict:
+    """Build per-action policies: retries off, RETRY_ATTEMPTS with `retry`,
+    an optional global attempt count, then per-action `overrides`
+    
+    The global count only applies to the RETRY_ATTEMPTS actions; retrying
+    crawl, wait or assert_perf repeats work that would fail the same way,
+    so they change only through `overrides`.
+    """
+    policies = {action: dict(policy) for action, policy in DEFAULT_RETRY_POLICIES.items()}
+    if retry:
+        for action, attempts in RETRY_ATTEMPTS.items():
+            policies[action]['max_attempts'] = attempts
+    if max_attempts is not None:
+        for action in RETRY_ATTEMPTS:
+            policies[action]['max_attempts'] = max_attempts
+    for action, policy in (overrides or {}).items():
+        policies[action] = {**policies.get(action, NO_RETRY), **policy}
+    return policies
+
+# Defaults for the crawl action, overridable via "key=value, ..." in the step value
+CRAWL_DEFAULTS = {'concurrency': 5, 'timeout': 15000, 'depth': 1, 'same_origin': True, 'limit': 200}
+
+def parse_crawl_options(value) -> dict:
+    """Parse e.g. "concurrency=10, depth=2, same_origin=false" over CRAWL_DEFAULTS"""
+    options = dict(CRAWL_DEFAULTS)
+    for part in str(value or '').split(','):
+        if '=' not in part:
+            continue
+        key, raw = (item.strip() for item in part.split('=', 1))
+        if key not in options:
+            continue
+        if isinstance(options[key], bool):
+            options[key] = raw.lower() in ('1', 'true', 'yes')
+        else:
+            options[key] = int(raw)
+    return options
+
+# Milliseconds collect_performance waits for the load event after a navigate
+# or click; a page still loading after that is measured as it stands
+PERF_LOAD_TIMEOUT = 10000
+
+# Budget names accepted by assert_perf, mapped to collect_performance() keys
+PERF_METRIC_ALIASES = {
+    'load': 'load_ms',
+    'dcl': 'dom_content_loaded_ms',
+    'domcontentloaded': 'dom_content_loaded_ms',
+    'ttfb': 'ttfb_ms',
+    'fp': 'first_paint_ms',
+    'first_paint': 'first_paint_ms',
+    'fcp': 'first_contentful_paint_ms',
+    'first_contentful_paint': 'first_contentful_paint_ms',
+    'requests': 'request_count',
+    'transfer': 'transferred_bytes',
+    'transferred': 'transferred_bytes',
+    'bytes': 'transferred_bytes',
+    'heap': 'js_heap_bytes',
+    'js_heap': 'js_heap_bytes',
+}
+# Units allowed per metric, with their factor to the collected value
+TIME_UNITS = {'': 1, 'ms': 1, 's': 1000}
+BYTE_UNITS = {'': 1, 'b': 1, 'kb': 1024, 'mb': 1024 ** 2}
+COUNT_UNITS = {'': 1}
+PERF_UNITS = {
+    'load_ms': TIME_UNITS,
+    'dom_content_loaded_ms': TIME_UNITS,
+    'ttfb_ms': TIME_UNITS,
+    'first_paint_ms': TIME_UNITS,
+    'first_contentful_paint_ms': TIME_UNITS,
+    'request_count': COUNT_UNITS,
+    'transferred_bytes': BYTE_UNITS,
+    'js_heap_bytes': BYTE_UNITS,
+}
+PERF_OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+_BUDGET_RE = re.compile(r'^\s*([a-z_]+)\s*(<=|>=|<|>)\s*([\d.]+)\s*([a-z]*)\s*$')
+
+def parse_perf_budget(budget: str) -> list:
+    """Parse e.g. "load < 2000ms, requests < 80, transfer < 2mb" into checks"""
+    checks = []
+    for part in str(budget or '').lower().split(','):
+        if not part.strip():
+            continue
+        match = _BUDGET_RE.match(part)
+        if not match:
+            raise ValueError(f"Invalid performance budget: '{part.strip()}'")
+        name, op, number, unit = match.groups()
+        metric = PERF_METRIC_ALIASES.get(name, name)
+        if metric not in PERF_UNITS:
+            raise ValueError(f"Unknown performance metric: '{name}'")
+        units = PERF_UNITS[metric]
+        if unit not in units:
+            allowed = ', '.join(u for u in units if u) or 'none'
+            raise ValueError(f"Unit '{unit}' does not fit '{name}' in '{part.strip()}' (allowed: {allowed})")
+        checks.append({'budget': part.strip(), 'metric': metric, 'op': op,
+                       'limit': float(number) * units[unit]})
+    return checks
+
+def check_perf_budget(metrics: dict, checks: list) -> list:
+    """Return the budget checks that the collected metrics violate"""
+    violations = []
+    for check in checks:
+        actual = metrics.get(check['metric'])
+        if actual is None or not PERF_OPERATORS[check['op']](actual, check['limit']):
+            violations.append({**check, 'actual': actual})
+    return violations
+
+async def _run_action(browser: PlaywrightBrowser, action: str, target, value, state: dict = None) -> dict:
+    """Run a single step once and return its status, error and data
+    
+    `state` carries data between steps of one plan (e.g. extracted links
+    for a later crawl).
+    """
+    state = state if state is not None else {}
+    outcome = {"status": "success", "error": None, "data": None}
+    
+    if action == 'navigate':
+        result = await browser.navigate(target)
+        outcome['status'] = result['status']
+        if result['status'] == 'failed':
+            outcome['error'] = result.get('error')
+    
+    elif action == 'click':
+        result = await browser.click(target)
+        outcome['status'] = result['status']
+        if result['status'] == 'failed':
+            outcome['error'] = result.get('error')
+    
+    elif action == 'type':
+        result = await browser.type_text(target, value or '')
+        outcome['status'] = result['status']
+        if result['status'] == 'failed':
+            outcome['error'] = result.get('error')
+    
+    elif action == 'extract':
+        if target in ['links', 'link']:
+            # Keep every link for a later crawl; only the first 20 go in the report
+            result = await browser.extract_links(limit=None)
+            if result['status'] == 'success':
+                state['links'] = [link['href'] for link in result['data']]
+                result['data'] = result['data'][:20]
+        else:
+            result = await browser.extract_text()
+        
+        outcome['status'] = result['status']
+        outcome['data'] = result.get('data', [])
+        
+        if result['status'] == 'failed':
+            outcome['error'] = result.get('error')
+        else:
+            logger.info(f"📊 Extracted {len(outcome['data'])} items")
+            if outcome['data'] and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Preview: {truncate_payload(outcome['data'][:3])}")
+    
+    elif action == 'crawl':
+        options = parse_crawl_options(value)
+        if target in (None, '', 'links', 'link'):
+            urls = state.get('links') or await browser.collect_hrefs()
+        else:
+            urls = await browser.collect_hrefs(target)
+        
+        if not urls:
+            outcome['status'] = 'failed'
+            outcome['error'] = "No URLs to crawl"
+        else:
+            result = await browser.crawl(
+                urls,
+                concurrency=options['concurrency'],
+                timeout=options['timeout'],
+                same_origin=options['same_origin'],
+                max_depth=options['depth'],
+                max_pages=options['limit']
+            )
+            outcome['status'] = result['status']
+            outcome['data'] = result['data']
+            outcome['error'] = result.get('error')
+            logger.info(f"🕸️  Crawled {len(result['data'])} URLs, {outcome['error'] or 'all OK'}")
+    
+    elif action == 'assert_perf':
+        checks = parse_perf_budget(target)
+        result = await browser.collect_performance(wait_for_load=True)
+        outcome['status'] = result['status']
+        outcome['error'] = result.get('error')
+        if result['status'] == 'success':
+            metrics = result['data']
+            violations = check_perf_budget(metrics, checks)
+            outcome['data'] = {'metrics': metrics, 'violations': violations}
+            outcome['performance'] = metrics
+            if violations:
+                outcome['status'] = 'failed'
+                outcome['error'] = "Performance budget exceeded: " + "; ".join(
+                    f"{v['budget']} (actual {v['actual']})" for v in violations
+                )
+                logger.warning(f"❌ {outcome['error']}")
+            else:
+                logger.info(f"⚡ Performance budget met: {target}")
+    
+    elif action == 'wait':
+        wait_time = int(target) if target else 2
+        await asyncio.sleep(wait_time)
+        logger.info(f"⏳ Waited {wait_time} seconds")
+    
+    else:
+        outcome['status'] = 'skipped'
+        outcome['error'] = f"Unknown action: {action}"
+        logger.warning(f"⚠️  {outcome['error']}")
+    
+    return outcome
+
+# Actions that can run together in one page evaluation (see run_dom_batch)
+BATCHABLE_ACTIONS = ('type', 'click')
+
+def find_dom_batch(plan: list, start: int) -> list:
+    """Steps from `start` that can run as one DOM batch: type steps, optionally ending in one click
+    
+    Returns [] when there are fewer than two type steps, since only the
+    fills share a round trip.
+    """
+    batch = []
+    for step in plan[start:]:
+        if step.get('action') not in BATCHABLE_ACTIONS or not step.get('target'):
+            break
+        batch.append(step)
+        if step.get('action') == 'click':
+            break
+    return batch if sum(1 for step in batch if step['action'] == 'type') > 1 else []
+
+async def _run_dom_batch(browser: PlaywrightBrowser, batch: list) -> tuple:
+    """Run a DOM batch; return step results for the steps up to the first failure and the failed click's attempt
+    
+    A fill that failed inside the page is not returned, so it runs again
+    the regular way. A final click that failed was already tried through
+    click(); its (outcome, seconds) is returned as that step's first
+    attempt, otherwise None.
+    """
+    actions = [{'action': step['action'], 'selector': step['target'], 'value': step.get('value') or ''}
+               for step in batch]
+    batch_start = time.perf_counter()
+    result = await browser.run_dom_batch(actions)
+    elapsed = time.perf_counter() - batch_start
+    
+    step_results = []
+    click_attempt = None
+    for step, outcome in zip(batch, result['data']):
+        if outcome['status'] != 'success':
+            if step['action'] == 'click':
+                click_attempt = ({"status": "failed", "error": outcome['error'], "data": None}, outcome['ms'] / 1000)
+            break
+        duration = outcome['ms'] / 1000 if outcome['ms'] is not None else elapsed / len(batch)
+        ACTION_SECONDS.observe(duration, action=step['action'])
+        step_results.append({
+            "step": step,
+            "status": "success",
+            "error": None,
+            "data": None,
+            "attempts": 1,
+            "attempt_durations": [round(duration, 3)],
+            "performance": None
+        })
+    if click_attempt:
+        logger.info(f"📦 Filled {len(step_results)} fields in one batch; the click failed ({result['error']})")
+    elif result['status'] == 'failed':
+        logger.info(f"📦 Batch stopped after {len(step_results)}/{len(batch)} steps ({result['error']}); "
+                    f"continuing step by step for the rest of the plan")
+    else:
+        logger.info(f"📦 Ran {len(batch)} steps in one batch ({elapsed * 1000:.0f} ms)")
+    return step_results, click_attempt
+
+async def _execute_step(browser: PlaywrightBrowser, step: dict, retry_policies: dict, state: dict,
+                        first_attempt: tuple = None) -> dict:
+    """Run one step with its retry policy and return its result
+    
+    `first_attempt` is an (outcome, seconds) already tried elsewhere (a
+    batch's click); it counts as attempt 1 and only retries run here.
+    """
+    logger.info(f"▶️  Executing: {step}")
+    
+    action = step.get('action')
+    target = step.get('target')
+    value = step.get('value')
+    policy = retry_policies.get(action, NO_RETRY)
+    max_attempts = max(1, int(policy.get('max_attempts', 1)))
+    
+    step_result = {
+        "step": step,
+        "status": "success",
+        "error": None,
+        "data": None,
+        "attempts": 0,
+        "attempt_durations": [],
+        "performance": None
+    }
+    
+    step_start = time.perf_counter() - (first_attempt[1] if first_attempt else 0)
+    for attempt in range(1, max_attempts + 1):
+        if attempt > 1:
+            delay = policy.get('backoff', 0) * policy.get('backoff_factor', 1) ** (attempt - 2)
+            logger.info(f"🔁 Retrying {action} (attempt {attempt}/{max_attempts}) in {delay:.1f}s")
+            STEP_RETRIES.inc(action=action)
+            await asyncio.sleep(delay)
+        
+        if attempt == 1 and first_attempt:
+            outcome, duration = first_attempt
+        else:
+            attempt_start = time.perf_counter()
+            try:
+                outcome = await _run_action(browser, action, target, value, state)
+            except Exception as e:
+                outcome = {"status": "failed", "error": str(e), "data": None}
+                logger.warning(f"❌ Error: {e}")
+            duration = time.perf_counter() - attempt_start
+        
+        step_result['attempt_durations'].append(round(duration, 3))
+        step_result['attempts'] = attempt
+        step_result.update(outcome)
+        
+        if outcome['status'] != 'failed':
+            break
+    
+    ACTION_SECONDS.observe(time.perf_counter() - step_start, action=action)
+    return step_result
+
+async def execute_plan_async(plan: list, browser: PlaywrightBrowser = None, on_step=None,
+                             retry_policies: dict = None, collect_performance: bool = False,
+                             batch_dom_actions: bool = False) -> dict:
+    """Execute the test plan using Playwright (async)
+    
+    Pass an already-started `browser` (e.g. a session from a warm browser)
+    to reuse it; it is closed afterwards either way. `on_step` is called
+    with each step result as soon as the step finishes. Failed steps are
+    retried on the same page according to `retry_policies` (see
+    resolve_retry_policies). With `collect_performance`, page performance
+    metrics are recorded after each successful navigate/click, once the page
+    has loaded (or after PERF_LOAD_TIMEOUT, leaving load_ms empty). With
+    `batch_dom_actions`, runs of type steps on a loaded page are filled in a
+    single page evaluation (a click ending the run follows right after);
+    once a batch fails, the rest of the plan runs step by step.
+    """
+    
+    if retry_policies is None:
+        retry_policies = DEFAULT_RETRY_POLICIES
     
-    browser = PlaywrightBrowser(headless=False)
-    await browser.start()
+    if browser is None:
+        browser = PlaywrightBrowser(headless=False)
+        await browser.start()
     
     results = {
         "test_name": "UI Test",
         "steps": []
     }
+    state = {}
     
     try:
-        for step in plan:
-            print(f"\n▶️  Executing: {step}")
+        index = 0
+        while index < len(plan):
+            batching = batch_dom_actions and state.get('page_loaded') and not state.get('batch_failed')
+            batch = find_dom_batch(plan, index) if batching else []
+            if batch:
+                with log_context(step=index + 1):
+                    step_results, click_attempt = await _run_dom_batch(browser, batch)
+                # A page that rejects one fill (CSP, odd state) would likely reject the next batch
+                state['batch_failed'] = len(step_results) < len(batch) and click_attempt is None
+            else:
+                step_results, click_attempt = [], None
             
-            action = step.get('action')
-            target = step.get('target')
-            value = step.get('value')
+            # Whatever the batch did not finish runs the regular way, starting with the failed step
+            if not batch or len(step_results) < len(batch):
+                with log_context(step=index + len(step_results) + 1):
+                    step = plan[index + len(step_results)]
+                    step_results.append(await _execute_step(browser, step, retry_policies, state, click_attempt))
             
-            step_result = {
-                "step": step,
-                "status": "success",
-                "error": None,
-                "data": None
-            }
-            
-            try:
-                if action == 'navigate':
-                    result = await browser.navigate(target)
-                    step_result['status'] = result['status']
-                    if result['status'] == 'failed':
-                        step_result['error'] = result.get('error')
-                
-                elif action == 'click':
-                    result = await browser.click(target)
-                    step_result['status'] = result['status']
-                    if result['status'] == 'failed':
-                        step_result['error'] = result.get('error')
+            for step_result in step_results:
+                action = step_result['step'].get('action')
+                if collect_performance and action in ('navigate', 'click') and step_result['status'] == 'success':
+                    perf = await browser.collect_performance(wait_for_load=True, timeout=PERF_LOAD_TIMEOUT)
+                    if perf['status'] == 'failed':
+                        perf = await browser.collect_performance()
+                    step_result['performance'] = perf.get('data')
+                if action == 'navigate' and step_result['status'] == 'success':
+                    state['page_loaded'] = True
                 
-                elif action == 'type':
-                    result = await browser.type_text(target, value or '')
-                    step_result['status'] = result['status']
-                    if result['status'] == 'failed':
-                        step_result['error'] = result.get('error')
-                
-                elif action == 'extract':
-                    if target in ['links', 'link']:
-                        result = await browser.extract_links()
-                    else:
-                        result = await browser.extract_text()
-                    
-                    step_result['status'] = result['status']
-                    step_result['data'] = result.get('data', [])
-                    
-                    if result['status'] == 'failed':
-                        step_result['error'] = result.get('error')
-                    else:
-                        print(f"   📊 Extracted {len(step_result['data'])} items")
-                        if step_result['data']:
-                            print(f"   Preview: {step_result['data'][:3]}")
-                
-                elif action == 'wait':
-                    wait_time = int(target) if target else 2
-                    await asyncio.sleep(wait_time)
-                    print(f"   ⏳ Waited {wait_time} seconds")
-                
-                else:
-                    step_result['status'] = 'skipped'
-                    step_result['error'] = f"Unknown action: {action}"
-                    print(f"   ⚠️  {step_result['error']}")
-            
-            except Exception as e:
-                step_result['status'] = 'failed'
-                step_result['error'] = str(e)
-                print(f"   ❌ Error: {e}")
-            
-            results['steps'].append(step_result)
+                STEPS_TOTAL.inc(action=action, status=step_result['status'])
+                results['steps'].append(step_result)
+                if on_step:
+                    on_step(step_result)
+            index += len(step_results)
     
     finally:
         await browser.close()
     
     return results
 
-def execute_plan(plan: list) -> dict:
+def execute_plan(plan: list, retry_policies: dict = None, collect_performance: bool = False,
+                 batch_dom_actions: bool = False) -> dict:
     """Sync wrapper for execute_plan_async"""
-    return asyncio.run(execute_plan_async(plan))
\ No newline at end of file
+    return asyncio.run(execute_plan_async(plan, retry_policies=retry_policies,
+                                          collect_performance=collect_performance,
+                                          batch_dom_actions=batch_dom_actions))
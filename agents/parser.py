@@ -1,20 +1,44 @@
+import asyncio
 import os
+import weakref
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+from utils.metrics import PARSE_SECONDS
+from utils.logger import get_logger
 
 load_dotenv()
 
-# Initialize GitHub Models client
-client = OpenAI(
-    base_url="https://models.inference.ai.azure.com",
-    api_key=os.getenv("GITHUB_TOKEN")
-)
+logger = get_logger(__name__)
 
-def parse_test(user_input: str):
+# GitHub Models clients, one per event loop: the underlying connection pool
+# is bound to the loop it was created on and is reused by every parse there
+_clients = weakref.WeakKeyDictionary()
+
+def get_client() -> AsyncOpenAI:
+    """GitHub Models client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(
+            base_url="https://models.inference.ai.azure.com",
+            api_key=os.getenv("GITHUB_TOKEN")
+        )
+        _clients[loop] = client
+    return client
+
+async def parse_test_async(user_input: str):
     """Use GitHub Models to parse test instructions"""
     
+    with PARSE_SECONDS.time():
+        return await _parse_with_model(user_input)
+
+def parse_test(user_input: str):
+    """Sync wrapper for parse_test_async"""
+    return asyncio.run(parse_test_async(user_input))
+
+async def _parse_with_model(user_input: str):
     try:
-        response = client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -23,7 +47,10 @@ def parse_test(user_input: str):
 Return ONLY a Python list in this exact format (no markdown, no explanations):
 [{"action": "navigate", "target": "url"}, {"action": "extract", "target": "data"}]
 
-Available actions: navigate, click, type, extract, wait
+Available actions: navigate, click, type, extract, wait, crawl, assert_perf
+For crawl, target is "links" (use links from a previous extract of links) or a CSS selector,
+and value holds options such as "concurrency=5, depth=1, same_origin=true, limit=200".
+For assert_perf, target is a performance budget such as "load < 2000ms, requests < 80".
 """
                 },
                 {
@@ -36,11 +63,11 @@ Available actions: navigate, click, type, extract, wait
         )
         
         content = response.choices[0].message.content
-        print(f"🤖 GitHub Model Response: {content}")
+        logger.debug(f"🤖 GitHub Model Response: {content}")
         return content
         
     except Exception as e:
-        print(f"❌ Error calling GitHub Models API: {e}")
+        logger.error(f"❌ Error calling GitHub Models API: {e}")
         # Fallback to simple parsing
         return simple_parse(user_input)
 
@@ -61,11 +88,14 @@ def simple_parse(user_input: str):
     if url:
         steps.append({"action": "navigate", "target": url})
     
-    if 'list' in lower_input or 'get' in lower_input or 'extract' in lower_input:
+    if 'crawl' in lower_input or 'check links' in lower_input or 'check all links' in lower_input:
+        steps.append({"action": "extract", "target": "links"})
+        steps.append({"action": "crawl", "target": "links"})
+    elif 'list' in lower_input or 'get' in lower_input or 'extract' in lower_input:
         if 'solution' in lower_input:
             steps.append({"action": "extract", "target": "solutions"})
         else:
             steps.append({"action": "extract", "target": "data"})
     
-    print(f"📝 Fallback parsed steps: {steps}")
+    logger.info(f"📝 Fallback parsed steps: {steps}")
     return str(steps)
\ No newline at end of file
@@ -1,3 +1,7 @@
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 def create_plan(steps: list) -> list:
     """
     Create an execution plan from parsed steps.
@@ -8,12 +12,12 @@ def create_plan(steps: list) -> list:
     for step in steps:
         # Validate step structure
         if not isinstance(step, dict):
-            print(f"⚠️  Invalid step format: {step}")
+            logger.warning(f"⚠️  Invalid step format: {step}")
             continue
         
         # Ensure required fields
         if 'action' not in step:
-            print(f"⚠️  Step missing 'action' field: {step}")
+            logger.warning(f"⚠️  Step missing 'action' field: {step}")
             continue
         
         # Add step to plan with defaults
@@ -24,6 +28,6 @@ def create_plan(steps: list) -> list:
         }
         
         plan.append(planned_step)
-        print(f"   ✓ Added to plan: {planned_step['action']} -> {planned_step['target']}")
+        logger.debug(f"✓ Added to plan: {planned_step['action']} -> {planned_step['target']}")
     
     return plan
\ No newline at end of file
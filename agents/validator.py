@@ -1,9 +1,18 @@
 from schemas.result_schema import TestReport, StepResult
+from utils.metrics import VALIDATE_SECONDS
 from datetime import datetime
 
 def validate_results(results: dict) -> TestReport:
     """Validate test execution results and generate report"""
     
+    with VALIDATE_SECONDS.time():
+        return _build_report(results)
+
+async def validate_results_async(results: dict) -> TestReport:
+    """Async entry point for validate_results (validation itself does no I/O)"""
+    return validate_results(results)
+
+def _build_report(results: dict) -> TestReport:
     # Extract step results
     step_results = []
     for step_data in results.get('steps', []):
@@ -12,7 +21,10 @@ def validate_results(results: dict) -> TestReport:
             status=step_data.get('status', 'unknown'),
             error=step_data.get('error'),
             screenshot=step_data.get('screenshot'),
-            data=step_data.get('data')
+            data=step_data.get('data'),
+            attempts=step_data.get('attempts', 1),
+            attempt_durations=step_data.get('attempt_durations', []),
+            performance=step_data.get('performance')
         )
         step_results.append(step_result)
     
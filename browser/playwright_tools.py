@@ -1,6 +1,78 @@
 from playwright.async_api import async_playwright
 import asyncio
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List
+from urllib.parse import urldefrag, urlparse
+from utils.metrics import BROWSERS_OPEN, CONTEXTS_OPEN
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds a context or browser gets to close; a hung browser never answers
+CLOSE_TIMEOUT = 20
+
+# Evaluated in the page; times are milliseconds from navigation start
+PERFORMANCE_SCRIPT = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const paints = {};
+    performance.getEntriesByType('paint').forEach(p => { paints[p.name] = p.startTime; });
+    const resources = performance.getEntriesByType('resource');
+    const transferred = resources.reduce((sum, r) => sum + (r.transferSize || 0), nav ? (nav.transferSize || 0) : 0);
+    return {
+        ttfb_ms: nav ? nav.responseStart - nav.requestStart : null,
+        dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+        load_ms: nav && nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : null,
+        first_paint_ms: paints['first-paint'] ?? null,
+        first_contentful_paint_ms: paints['first-contentful-paint'] ?? null,
+        transferred_bytes: transferred,
+        request_count: resources.length + (nav ? 1 : 0),
+        js_heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null
+    };
+}"""
+
+# The default 250-entry resource timing buffer would silently cap request
+# counts and transferred bytes on heavy pages
+RESOURCE_TIMING_SCRIPT = "performance.setResourceTimingBufferSize(100000)"
+
+# Fills [{action, selector, value}] type actions in order inside the page and
+# stops at the first one that fails. Only text fields are filled, with
+# page.fill's checks but not its waiting; anything else (checkboxes, selects,
+# number inputs, read-only or not yet ready elements) fails, so the caller
+# runs it the regular way.
+DOM_BATCH_SCRIPT = """(actions) => {
+    const TEXT_INPUT_TYPES = ['text', 'search', 'email', 'password', 'tel', 'url'];
+    const results = [];
+    for (const {action, selector, value} of actions) {
+        const start = performance.now();
+        const fail = (error) => results.push({status: 'failed', error, ms: performance.now() - start});
+        let el;
+        try {
+            el = document.querySelector(selector);
+        } catch (e) {
+            fail(`Invalid selector for batching: ${selector}`);
+            break;
+        }
+        if (!el) { fail(`Element not found: ${selector}`); break; }
+        if (!el.getClientRects().length) { fail(`Element not visible: ${selector}`); break; }
+        if (el.disabled) { fail(`Element is disabled: ${selector}`); break; }
+        const textField = el instanceof HTMLTextAreaElement
+            || (el instanceof HTMLInputElement && TEXT_INPUT_TYPES.includes(el.type));
+        if (!textField && !el.isContentEditable) { fail(`Element is not a text field: ${selector}`); break; }
+        if (textField && el.readOnly) { fail(`Element is read-only: ${selector}`); break; }
+        el.focus();
+        if (textField) {
+            // Native setter, so framework-controlled inputs see the change
+            const proto = Object.getPrototypeOf(el);
+            Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+        } else {
+            el.textContent = value;
+        }
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        results.push({status: 'success', error: null, ms: performance.now() - start});
+    }
+    return results;
+}"""
 
 class PlaywrightBrowser:
     def __init__(self, headless: bool = False):
@@ -9,14 +81,46 @@ class PlaywrightBrowser:
         self.context = None
         self.page = None
         self.playwright = None
+        self.owns_browser = True
+        self.driver_pid = None  # Set by ManagedBrowser to sample memory
+        self.peak_rss_bytes = None  # Highest browser memory seen while this session was open
     
     async def start(self):
         """Start the browser"""
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(headless=self.headless)
+        BROWSERS_OPEN.inc()
         self.context = await self.browser.new_context()
+        await self.context.add_init_script(RESOURCE_TIMING_SCRIPT)
+        CONTEXTS_OPEN.inc()
         self.page = await self.context.new_page()
-        print(f"✅ Browser started (headless={self.headless})")
+        logger.info(f"✅ Browser started (headless={self.headless})")
+    
+    async def new_session(self) -> 'PlaywrightBrowser':
+        """Open an isolated context + page on this already-running browser"""
+        session = PlaywrightBrowser(headless=self.headless)
+        session.playwright = self.playwright
+        session.browser = self.browser
+        session.owns_browser = False
+        session.context = await self.browser.new_context()
+        await session.context.add_init_script(RESOURCE_TIMING_SCRIPT)
+        CONTEXTS_OPEN.inc()
+        session.page = await session.context.new_page()
+        return session
+    
+    def is_connected(self) -> bool:
+        """False once the browser has crashed or been closed"""
+        return self.browser is not None and self.browser.is_connected()
+    
+    @property
+    def peak_memory_mb(self) -> Optional[float]:
+        return round(self.peak_rss_bytes / 1024 / 1024, 1) if self.peak_rss_bytes else None
+    
+    def page_count(self) -> int:
+        """Pages open across all contexts of the browser"""
+        if not self.is_connected():
+            return 0
+        return sum(len(context.pages) for context in self.browser.contexts)
     
     async def navigate(self, url: str) -> Dict[str, Any]:
         """Navigate to a URL"""
@@ -24,7 +128,7 @@ class PlaywrightBrowser:
             url = f'https://{url}'
         
         try:
-            print(f"🌐 Navigating to {url}")
+            logger.debug(f"🌐 Navigating to {url}")
             await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
             return {"status": "success", "url": url}
         except Exception as e:
@@ -33,7 +137,7 @@ class PlaywrightBrowser:
     async def click(self, selector: str) -> Dict[str, Any]:
         """Click an element"""
         try:
-            print(f"🖱️  Clicking: {selector}")
+            logger.debug(f"🖱️  Clicking: {selector}")
             await self.page.click(selector, timeout=5000)
             return {"status": "success"}
         except Exception as e:
@@ -42,16 +146,39 @@ class PlaywrightBrowser:
     async def type_text(self, selector: str, text: str) -> Dict[str, Any]:
         """Type text into an element"""
         try:
-            print(f"⌨️  Typing '{text}' into {selector}")
+            logger.debug(f"⌨️  Typing '{text}' into {selector}")
             await self.page.fill(selector, text)
             return {"status": "success"}
         except Exception as e:
             return {"status": "failed", "error": str(e)}
     
+    async def run_dom_batch(self, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run consecutive type actions in one page evaluation, then an optional final click
+        
+        `data` holds a {status, error, ms} result per action the page
+        confirmed, stopping at the first failure. The click, which may
+        navigate away, is issued through click() once every fill succeeded.
+        """
+        fills = actions[:-1] if actions[-1]['action'] == 'click' else actions
+        try:
+            logger.debug(f"📦 Running {len(fills)} fills in one batch")
+            await self.page.wait_for_load_state('domcontentloaded')
+            results = await self.page.evaluate(DOM_BATCH_SCRIPT, fills)
+        except Exception as e:
+            # Nothing is confirmed, so nothing counts as done
+            return {"status": "failed", "error": str(e), "data": []}
+        if len(fills) < len(actions) and all(r['status'] == 'success' for r in results):
+            start = time.perf_counter()
+            clicked = await self.click(actions[-1]['selector'])
+            results.append({"status": clicked['status'], "error": clicked.get('error'),
+                            "ms": (time.perf_counter() - start) * 1000})
+        failed = next((r for r in results if r['status'] == 'failed'), None)
+        return {"status": "failed" if failed else "success", "error": failed and failed['error'], "data": results}
+    
     async def extract_text(self, selector: str = "body") -> Dict[str, Any]:
         """Extract text from elements"""
         try:
-            print(f"📄 Extracting text from: {selector}")
+            logger.debug(f"📄 Extracting text from: {selector}")
             elements = await self.page.query_selector_all(selector)
             texts = []
             for element in elements[:10]:  # Limit to first 10
@@ -62,20 +189,101 @@ class PlaywrightBrowser:
         except Exception as e:
             return {"status": "failed", "error": str(e)}
     
-    async def extract_links(self) -> Dict[str, Any]:
+    async def extract_links(self, limit: Optional[int] = 20) -> Dict[str, Any]:
         """Extract all links from the page"""
         try:
-            print(f"🔗 Extracting links")
+            logger.debug("🔗 Extracting links")
             links = await self.page.eval_on_selector_all(
                 'a[href]',
                 '(elements) => elements.map(e => ({text: e.innerText.trim(), href: e.href}))'
             )
             # Filter and limit
-            links = [link for link in links if link['text']][:20]
+            links = [link for link in links if link['text']][:limit]
             return {"status": "success", "data": links}
         except Exception as e:
             return {"status": "failed", "error": str(e)}
     
+    async def collect_hrefs(self, selector: str = "a[href]", page=None) -> List[str]:
+        """Absolute hrefs of all elements matching selector (no limit)"""
+        page = page or self.page
+        return await page.eval_on_selector_all(
+            selector,
+            '(elements) => elements.map(e => e.href).filter(h => h && h.startsWith("http"))'
+        )
+    
+    async def crawl(self, urls: List[str], concurrency: int = 5, timeout: int = 15000,
+                    same_origin: bool = True, max_depth: int = 1, max_pages: int = 200) -> Dict[str, Any]:
+        """Open URLs in parallel pages of this context and report status and load time
+        
+        Depth 1 visits only `urls`; deeper crawls follow links found on each
+        visited page. URLs are de-duplicated (ignoring fragments) and, with
+        `same_origin`, restricted to the current page's origin.
+        """
+        origin = urlparse(self.page.url).netloc if self.page else ""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        seen = set()
+        visited = []
+        
+        def admit(url: str) -> Optional[str]:
+            url = urldefrag(url)[0]
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https') or url in seen or len(seen) >= max_pages:
+                return None
+            if same_origin and origin and parsed.netloc != origin:
+                return None
+            seen.add(url)
+            return url
+        
+        async def visit(url: str, depth: int) -> Dict[str, Any]:
+            async with semaphore:
+                page = await self.context.new_page()
+                start = time.perf_counter()
+                entry = {"url": url, "depth": depth, "status": "success", "http_status": None,
+                         "load_time_ms": None, "error": None, "links": []}
+                try:
+                    response = await page.goto(url, wait_until='domcontentloaded', timeout=timeout)
+                    entry["load_time_ms"] = round((time.perf_counter() - start) * 1000)
+                    entry["http_status"] = response.status if response else None
+                    if response and response.status >= 400:
+                        entry["status"] = "failed"
+                        entry["error"] = f"HTTP {response.status}"
+                    elif depth < max_depth:
+                        entry["links"] = await self.collect_hrefs(page=page)
+                except Exception as e:
+                    entry["status"] = "failed"
+                    entry["error"] = str(e).splitlines()[0]
+                    entry["load_time_ms"] = round((time.perf_counter() - start) * 1000)
+                finally:
+                    await page.close()
+                return entry
+        
+        frontier = [u for u in (admit(url) for url in urls) if u]
+        logger.info(f"🕸️  Crawling {len(frontier)} URLs (concurrency={concurrency}, depth={max_depth})")
+        depth = 1
+        while frontier:
+            entries = await asyncio.gather(*(visit(url, depth) for url in frontier))
+            visited.extend(entries)
+            depth += 1
+            frontier = [u for u in (admit(link) for entry in entries for link in entry.pop("links")) if u]
+        
+        failed = sum(1 for entry in visited if entry["status"] == "failed")
+        return {
+            "status": "failed" if failed else "success",
+            "data": visited,
+            "error": f"{failed} of {len(visited)} URLs failed" if failed else None
+        }
+    
+    async def collect_performance(self, wait_for_load: bool = False, timeout: int = 30000) -> Dict[str, Any]:
+        """Navigation Timing, paint timings, transfer size, request count and JS heap of the page"""
+        try:
+            if wait_for_load:
+                await self.page.wait_for_load_state('load', timeout=timeout)
+            metrics = await self.page.evaluate(PERFORMANCE_SCRIPT)
+            metrics = {key: round(value) if isinstance(value, float) else value for key, value in metrics.items()}
+            return {"status": "success", "data": metrics}
+        except Exception as e:
+            return {"status": "failed", "error": str(e)}
+    
     async def screenshot(self, path: str = "screenshot.png") -> Dict[str, Any]:
         """Take a screenshot"""
         try:
@@ -84,20 +292,51 @@ class PlaywrightBrowser:
         except Exception as e:
             return {"status": "failed", "error": str(e)}
     
+    async def ping(self, timeout: float = 5) -> bool:
+        """True if the browser answers a round trip within `timeout` seconds"""
+        if not self.is_connected():
+            return False
+        try:
+            context = await asyncio.wait_for(self.browser.new_context(), timeout)
+            await asyncio.wait_for(context.close(), timeout)
+            return True
+        except Exception:
+            return False
+    
+    async def _close_within(self, closing, what: str):
+        try:
+            await asyncio.wait_for(closing, CLOSE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"⚠️  {what} did not close cleanly: {str(e) or type(e).__name__}")
+    
     async def close(self):
-        """Close the browser"""
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
-        print("🔒 Browser closed")
+        """Close the browser (or just the context, for sessions); safe to call twice
+        
+        Each close is bounded by CLOSE_TIMEOUT, so cleanup after a cancelled
+        test cannot block on a hung browser.
+        """
+        context, self.context = self.context, None
+        if context:
+            CONTEXTS_OPEN.dec()
+        if not self.owns_browser:
+            if context:
+                await self._close_within(context.close(), "Browser context")
+            return
+        browser, self.browser = self.browser, None
+        playwright, self.playwright = self.playwright, None
+        if browser:
+            await self._close_within(browser.close(), "Browser")
+            BROWSERS_OPEN.dec()
+        if playwright:
+            await playwright.stop()
+        logger.info("🔒 Browser closed")
 
 # Helper function for sync usage
 def run_async(coro):
-    """Run async function in sync context"""
+    """Run async function in sync context (await it instead inside a running loop)"""
     try:
-        loop = asyncio.get_event_loop()
+        asyncio.get_running_loop()
     except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro)
\ No newline at end of file
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError("run_async() called from a running event loop; await the coroutine instead")
\ No newline at end of file
@@ -0,0 +1,285 @@
+from browser.playwright_tools import CLOSE_TIMEOUT, PlaywrightBrowser
+from utils.metrics import BROWSER_RECYCLES, BROWSER_RSS_BYTES, PAGES_OPEN
+from utils.logger import get_logger
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import asyncio
+import os
+
+try:
+    import psutil
+except ImportError:  # /proc is used instead (Linux only)
+    psutil = None
+
+logger = get_logger(__name__)
+
+# Defaults for ManagedBrowser; 0 / None disables a limit
+DEFAULT_MAX_TESTS = 50
+DEFAULT_SAMPLE_INTERVAL = 2.0
+# A browser that does not answer within this many seconds after a test timed out is hung
+PING_TIMEOUT = 5
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class BrowserCrashedError(RuntimeError):
+    """The browser a test ran on disconnected before the test finished"""
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    """{parent pid: [child pids]} for every process, read from /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after it are fixed
+        ppid = int(stat[stat.rindex(b")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def child_pids(pid: int = None) -> List[int]:
+    """Direct children of `pid` (default: this process)"""
+    pid = pid or os.getpid()
+    if psutil is not None:
+        try:
+            return [child.pid for child in psutil.Process(pid).children()]
+        except psutil.Error:
+            return []
+    if not os.path.isdir("/proc"):
+        return []
+    return _proc_children().get(pid, [])
+
+
+def _rss(pid: int) -> int:
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(pid: int) -> Optional[Dict[str, int]]:
+    """RSS in bytes of a Playwright driver (`driver`) and everything it started (`browser`)
+
+    Returns None when memory cannot be sampled on this platform.
+    """
+    if psutil is not None:
+        try:
+            descendants = [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return None
+    elif os.path.isdir("/proc"):
+        tree = _proc_children()
+        descendants, pending = [], list(tree.get(pid, []))
+        while pending:
+            child = pending.pop()
+            descendants.append(child)
+            pending.extend(tree.get(child, []))
+    else:
+        return None
+    return {"driver": _rss(pid), "browser": sum(_rss(child) for child in descendants)}
+
+
+class ManagedBrowser:
+    """A shared browser handing out per-test sessions, watched and recycled
+
+    The browser is replaced after `max_tests` tests, when the driver plus
+    browser processes exceed `max_memory_mb`, when a test on it times out
+    or when it disconnects (crashed). A replaced browser keeps serving the
+    sessions already open on it and is closed once they end, unless it has
+    crashed or stopped answering (hung).
+    Each session's `peak_rss_bytes` holds the highest memory sampled while
+    it was open.
+    """
+
+    def __init__(self, headless: bool = True, max_tests: int = DEFAULT_MAX_TESTS, max_memory_mb: float = None,
+                 sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.headless = headless
+        self.max_tests = max_tests
+        self.max_memory_mb = max_memory_mb
+        self.sample_interval = sample_interval
+        self.browser: Optional[PlaywrightBrowser] = None
+        self.tests_on_browser = 0
+        self.restarts = 0
+        self._sessions: Dict[PlaywrightBrowser, set] = {}
+        # Sessions being opened, counted so their browser is not disposed meanwhile
+        self._opening: Dict[PlaywrightBrowser, int] = {}
+        self._lock = asyncio.Lock()
+        self._sampler = None
+        self._warned_unsupported = False
+
+    async def start(self):
+        """Launch the browser now instead of on the first session"""
+        async with self._lock:
+            await self._ensure_browser()
+
+    async def _ensure_browser(self) -> PlaywrightBrowser:
+        if self.browser is None:
+            browser = PlaywrightBrowser(headless=self.headless)
+            before = set(child_pids())
+            await browser.start()
+            # Each browser gets its own Playwright driver process
+            new_children = [pid for pid in child_pids() if pid not in before]
+            browser.driver_pid = new_children[0] if len(new_children) == 1 else None
+            self.browser = browser
+            self.tests_on_browser = 0
+            self._sessions[browser] = set()
+        if self._sampler is None and self.sample_interval:
+            self._sampler = asyncio.create_task(self._sample_forever())
+        return self.browser
+
+    @asynccontextmanager
+    async def session(self):
+        """Open a session on the current browser; recycle the browser afterwards if needed
+
+        Raises BrowserCrashedError when the browser died during the test. A
+        timeout (asyncio.TimeoutError) is passed through after detaching the
+        browser; other tests on it carry on unless it no longer answers.
+        """
+        async with self._lock:
+            browser = await self._ensure_browser()
+            self.tests_on_browser += 1
+            # Reserve the slot before awaiting, so the browser outlives our new_session()
+            self._opening[browser] = self._opening.get(browser, 0) + 1
+            if self.max_tests and self.tests_on_browser >= self.max_tests:
+                # Last test on this browser; the next session starts a fresh one
+                self._detach("max_tests")
+        try:
+            session = await browser.new_session()
+        except BaseException:
+            self._end_opening(browser)
+            await self._release_if_idle(browser)
+            raise
+        self._end_opening(browser)
+        if browser not in self._sessions:
+            # Closed as hung or crashed while this session was opening
+            await session.close()
+            raise BrowserCrashedError("Browser was closed while the test was starting")
+        self._sessions[browser].add(session)
+        self.sample(browser)
+
+        try:
+            yield session
+        except asyncio.TimeoutError:
+            if await browser.ping(PING_TIMEOUT):
+                logger.warning("⏱️  Test timed out; replacing the browser once its other tests finish")
+                await self._retire(browser, "timeout")
+            else:
+                logger.warning("⏱️  Test timed out and the browser is not answering; closing it")
+                await self._retire(browser, "hung")
+            raise
+        finally:
+            crashed = not browser.is_connected()
+            self.sample(browser)
+            self._sessions.get(browser, set()).discard(session)
+            try:
+                await session.close()
+            except Exception as e:
+                logger.debug(f"Closing session failed: {e}")
+
+            if crashed:
+                await self._retire(browser, "crashed")
+            await self._release_if_idle(browser)
+
+        if crashed:
+            raise BrowserCrashedError("Browser disconnected during the test")
+
+    def sample(self, browser: PlaywrightBrowser = None) -> Optional[dict]:
+        """Sample memory and open pages of `browser` (default: current) and update session peaks"""
+        browser = browser or self.browser
+        if browser is None:
+            return None
+        usage = process_tree_rss(browser.driver_pid) if getattr(browser, "driver_pid", None) else None
+        if usage is None:
+            if not self._warned_unsupported:
+                logger.warning("⚠️  Browser memory cannot be sampled here; memory limits and peaks are disabled")
+                self._warned_unsupported = True
+            return None
+
+        total = usage["driver"] + usage["browser"]
+        for session in self._sessions.get(browser, ()):
+            session.peak_rss_bytes = max(session.peak_rss_bytes or 0, total)
+        if browser is self.browser:
+            BROWSER_RSS_BYTES.set(usage["driver"], process="driver")
+            BROWSER_RSS_BYTES.set(usage["browser"], process="browser")
+            PAGES_OPEN.set(browser.page_count())
+        return {**usage, "total": total}
+
+    async def _sample_forever(self):
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            try:
+                for browser in list(self._sessions):
+                    usage = self.sample(browser)
+                    if browser is not self.browser:
+                        continue
+                    if not browser.is_connected():
+                        await self._retire(browser, "crashed")
+                    elif usage and self.max_memory_mb and usage["total"] > self.max_memory_mb * 1024 * 1024:
+                        logger.warning(f"🧠 Browser using {usage['total'] / 1024 / 1024:.0f} MB "
+                                       f"(limit {self.max_memory_mb:.0f} MB)")
+                        await self._retire(browser, "memory")
+            except Exception as e:
+                logger.warning(f"⚠️  Browser watchdog sample failed: {e}")
+
+    async def _retire(self, browser: PlaywrightBrowser, reason: str):
+        """Stop handing out sessions on `browser`; close it once its sessions end"""
+        async with self._lock:
+            if browser is self.browser:
+                self._detach(reason)
+        # A hung or crashed browser is closed right away; its other tests fail
+        if reason in ("hung", "crashed") and browser in self._sessions:
+            await self._dispose(browser)
+        else:
+            await self._release_if_idle(browser)
+
+    def _end_opening(self, browser: PlaywrightBrowser):
+        self._opening[browser] -= 1
+        if not self._opening[browser]:
+            del self._opening[browser]
+
+    async def _release_if_idle(self, browser: PlaywrightBrowser):
+        """Close a replaced browser once no session is open or opening on it"""
+        if (browser is not self.browser and browser in self._sessions
+                and not self._sessions[browser] and not self._opening.get(browser)):
+            await self._dispose(browser)
+
+    def _detach(self, reason: str):
+        self.browser = None
+        self.restarts += 1
+        BROWSER_RECYCLES.inc(reason=reason)
+        logger.info(f"♻️  Recycling browser after {self.tests_on_browser} test(s) ({reason})")
+
+    async def _dispose(self, browser: PlaywrightBrowser):
+        self._sessions.pop(browser, None)
+        playwright = browser.playwright
+        try:
+            await asyncio.wait_for(browser.close(), CLOSE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"⚠️  Browser did not close cleanly ({str(e) or type(e).__name__}); stopping its driver")
+            if playwright is None:
+                return
+            try:
+                await asyncio.wait_for(playwright.stop(), CLOSE_TIMEOUT)
+            except Exception as e:
+                logger.error(f"❌ Could not stop the Playwright driver: {e}")
+
+    async def close(self):
+        """Close every browser this manager started"""
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+        self.browser = None
+        for browser in list(self._sessions):
+            await self._dispose(browser)
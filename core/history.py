@@ -0,0 +1,323 @@
+import csv
+import glob
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_HISTORY_DB = "test_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL UNIQUE,
+    started_at TEXT,
+    imported_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS test_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    test_name TEXT,
+    priority TEXT,
+    status TEXT,
+    duration_sec REAL,
+    started_at TEXT,
+    flaky_steps INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, test_id)
+);
+CREATE TABLE IF NOT EXISTS step_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    step_number INTEGER NOT NULL,
+    action TEXT,
+    status TEXT,
+    duration_sec REAL,
+    attempts INTEGER,
+    flaky INTEGER NOT NULL DEFAULT 0,
+    error_type TEXT,
+    started_at TEXT,
+    PRIMARY KEY (run_id, test_id, step_number)
+);
+-- Covering indexes so per-test / per-action queries never touch the tables
+CREATE INDEX IF NOT EXISTS idx_test_results_test
+    ON test_results (test_id, started_at, status, duration_sec, flaky_steps);
+CREATE INDEX IF NOT EXISTS idx_step_results_action
+    ON step_results (action, started_at, status, duration_sec, flaky);
+CREATE INDEX IF NOT EXISTS idx_step_results_test ON step_results (test_id, step_number);
+-- Percentile lookups walk these in duration order
+CREATE INDEX IF NOT EXISTS idx_test_results_duration ON test_results (test_id, duration_sec);
+CREATE INDEX IF NOT EXISTS idx_step_results_duration ON step_results (action, duration_sec);
+"""
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile of `values` (0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class HistoryStore:
+    """SQLite index of results CSV rows, keyed by run, test, step and time"""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def ingest_rows(self, source: str, rows: List[dict]) -> Optional[int]:
+        """Index one run's results rows; returns the run id, or None if already imported or unusable
+
+        Files without Test_ID rows (the older "Test Case Number" format,
+        which has no step times) are skipped without recording the source,
+        so they are not reported as imported.
+        """
+        source = os.path.abspath(source)
+        tests: Dict[str, dict] = {}
+        steps = []
+
+        for row in rows:
+            test_id = row.get('Test_ID')
+            if not test_id:
+                continue
+            test = tests.setdefault(test_id, {
+                "name": row.get('Test_Case_Name'),
+                "priority": row.get('Test_Priority'),
+                "status": (row.get('Overall_Test_Status') or "").lower(),
+                "duration": 0.0,
+                "test_duration": None,
+                "started_at": None,
+                "flaky": 0,
+            })
+            duration = _to_float(row.get('Execution_Time_Sec')) or 0.0
+            test["duration"] += duration
+            # Wall time including parsing; older files only have the step times
+            test["test_duration"] = test["test_duration"] or _to_float(row.get('Test_Duration_Sec'))
+            test["started_at"] = test["started_at"] or row.get('Test_Start_Time') or None
+            flaky = 1 if row.get('Step_Flaky') else 0
+            test["flaky"] += flaky
+            steps.append((
+                test_id,
+                _to_int(row.get('Step_Number')) or 0,
+                row.get('Step_Action'),
+                row.get('Step_Status'),
+                duration,
+                _to_int(row.get('Step_Attempts')),
+                flaky,
+                row.get('Error_Type') or None,
+            ))
+
+        if not tests:
+            logger.warning(f"⚠️  No Test_ID rows in {source}; skipping it (older results format?)")
+            return None
+
+        started = [test["started_at"] for test in tests.values() if test["started_at"]]
+        run_started_at = min(started) if started else None
+
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM runs WHERE source = ?", (source,)).fetchone():
+                return None
+            cursor = conn.execute(
+                "INSERT INTO runs (source, started_at, imported_at) VALUES (?, ?, ?)",
+                (source, run_started_at, datetime.now().isoformat()),
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                """INSERT OR REPLACE INTO test_results
+                   (run_id, test_id, test_name, priority, status, duration_sec, started_at, flaky_steps)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (run_id, test_id, t["name"], t["priority"], t["status"], t["test_duration"] or t["duration"],
+                     t["started_at"] or run_started_at, t["flaky"])
+                    for test_id, t in tests.items()
+                ],
+            )
+            conn.executemany(
+                """INSERT OR REPLACE INTO step_results
+                   (run_id, test_id, step_number, action, status, duration_sec, attempts, flaky, error_type, started_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(run_id,) + step + (tests[step[0]]["started_at"] or run_started_at,) for step in steps],
+            )
+        return run_id
+
+    def import_csv(self, path: str) -> Optional[int]:
+        """Index a results CSV; files already imported are skipped"""
+        with open(path, 'r', encoding='utf-8') as csvfile:
+            return self.ingest_rows(path, list(csv.DictReader(csvfile)))
+
+    def import_glob(self, pattern: str = "test_results_*.csv") -> int:
+        """Import every matching CSV not already in the store; returns the count imported"""
+        with self._connect() as conn:
+            known = {row[0] for row in conn.execute("SELECT source FROM runs")}
+        imported = 0
+        for path in sorted(glob.glob(pattern)):
+            if os.path.abspath(path) in known:
+                continue
+            try:
+                if self.import_csv(path) is not None:
+                    imported += 1
+            except (OSError, csv.Error) as e:
+                logger.warning(f"⚠️  Could not import {path}: {e}")
+        return imported
+
+    def test_stats(self, test_id: Optional[str] = None, last: Optional[int] = None) -> List[dict]:
+        """Per-test run count, pass rate, flakiness, outcome flip rate and p50/p95 duration"""
+        return self._stats("test_results", "test_id", "flaky_steps", test_id, last, with_flips=True)
+
+    def action_stats(self, action: Optional[str] = None, last: Optional[int] = None) -> List[dict]:
+        """Per-action step count, pass rate, flakiness and p50/p95 duration"""
+        return self._stats("step_results", "action", "flaky", action, last)
+
+    def _stats(self, table: str, key_column: str, flaky_column: str, key: Optional[str], last: Optional[int],
+               with_flips: bool = False) -> List[dict]:
+        """Aggregate `table` per key without loading every row into Python
+
+        With `last`, each key's most recent rows are read through the
+        (key, started_at) index. Otherwise counts and rates come from a
+        GROUP BY and percentiles from rank lookups on the (key, duration) index.
+        """
+        with self._connect() as conn:
+            if last:
+                if key is not None:
+                    keys = [key]
+                else:
+                    keys = [row[0] for row in conn.execute(f"SELECT DISTINCT {key_column} FROM {table}")]
+                stats = []
+                for row_key in keys:
+                    rows = conn.execute(
+                        f"""SELECT status, duration_sec, {flaky_column} FROM {table}
+                            WHERE {key_column} IS ? ORDER BY started_at DESC LIMIT ?""",
+                        (row_key, last),
+                    ).fetchall()
+                    if rows:
+                        stats.append(self._summarize(row_key or "", rows, with_flips))
+                return stats
+
+            where = f"WHERE {key_column} IS ?" if key is not None else ""
+            summary = conn.execute(
+                f"""SELECT {key_column}, COUNT(*), AVG(status IN ('success', 'partial')), AVG({flaky_column} > 0),
+                           COUNT(duration_sec)
+                    FROM {table} {where} GROUP BY {key_column}""",
+                (key,) if key is not None else (),
+            ).fetchall()
+            flips = {}
+            if with_flips:
+                # Streams the (key, started_at) index; cheaper than a LAG() window here
+                previous = (None, None)
+                for row_key, ok in conn.execute(
+                    f"""SELECT {key_column}, status IN ('success', 'partial') FROM {table} {where}
+                        ORDER BY {key_column}, started_at""",
+                    (key,) if key is not None else (),
+                ):
+                    if previous[0] == row_key and previous[1] != ok:
+                        flips[row_key] = flips.get(row_key, 0) + 1
+                    previous = (row_key, ok)
+
+            stats = []
+            for row_key, runs, pass_rate, flaky_rate, timed in summary:
+                entry = {
+                    "key": row_key or "",
+                    "runs": runs,
+                    "pass_rate": pass_rate,
+                    "flaky_rate": flaky_rate,
+                    "p50_sec": self._indexed_percentile(conn, table, key_column, row_key, timed, 50),
+                    "p95_sec": self._indexed_percentile(conn, table, key_column, row_key, timed, 95),
+                }
+                if with_flips:
+                    entry["flip_rate"] = (flips.get(row_key) or 0) / (runs - 1) if runs > 1 else 0.0
+                stats.append(entry)
+        return stats
+
+    @staticmethod
+    def _indexed_percentile(conn, table, key_column, key, count, pct) -> Optional[float]:
+        """percentile() of a key's durations, reading only the two values around the rank"""
+        if not count:
+            return None
+        rank = (count - 1) * pct / 100
+        low = int(rank)
+        values = [row[0] for row in conn.execute(
+            f"""SELECT duration_sec FROM {table} WHERE {key_column} IS ? AND duration_sec IS NOT NULL
+                ORDER BY duration_sec LIMIT 2 OFFSET ?""",
+            (key, low),
+        )]
+        high_value = values[1] if len(values) > 1 else values[0]
+        return values[0] + (high_value - values[0]) * (rank - low)
+
+    @staticmethod
+    def _summarize(key, rows, with_flips: bool = False) -> dict:
+        """Stats over (status, duration, flaky) rows, most recent first"""
+        durations = [row[1] for row in rows if row[1] is not None]
+        outcomes = [row[0] in ("success", "partial") for row in rows]
+        summary = {
+            "key": key,
+            "runs": len(rows),
+            "pass_rate": sum(outcomes) / len(rows),
+            "flaky_rate": sum(1 for row in rows if row[2]) / len(rows),
+            "p50_sec": percentile(durations, 50),
+            "p95_sec": percentile(durations, 95),
+        }
+        if with_flips:
+            # Outcome flips between consecutive runs also count as flakiness
+            flips = sum(1 for a, b in zip(outcomes, outcomes[1:]) if a != b)
+            summary["flip_rate"] = flips / (len(outcomes) - 1) if len(outcomes) > 1 else 0.0
+        return summary
+
+    def load_schedule_history(self, window: int) -> Dict[str, dict]:
+        """Recent durations/statuses per test, oldest first, in the scheduler's format"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT test_id, duration_sec, status FROM (
+                       SELECT test_id, duration_sec, status, started_at,
+                              ROW_NUMBER() OVER (PARTITION BY test_id ORDER BY started_at DESC) AS recency
+                       FROM test_results)
+                   WHERE recency <= ? ORDER BY test_id, started_at""",
+                (window,),
+            ).fetchall()
+        history = {}
+        for test_id, duration, status in rows:
+            entry = history.setdefault(test_id, {"durations": [], "statuses": []})
+            entry["durations"].append(duration or 0.0)
+            entry["statuses"].append(status or "")
+        return history
+
+    def duration_trend(self, test_id: str, last: int = 200) -> List[dict]:
+        """Duration and status of a test's most recent runs, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """SELECT started_at, duration_sec, status FROM test_results
+                   WHERE test_id = ? ORDER BY started_at DESC LIMIT ?""",
+                (test_id, last),
+            ).fetchall()
+        return [{"started_at": r[0], "duration_sec": r[1], "status": r[2]} for r in reversed(rows)]
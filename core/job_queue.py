@@ -0,0 +1,189 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Give up on a job after this many leases expire without a result
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    suite TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    test_case TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    result_rows TEXT,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs (suite, status, position);
+CREATE TABLE IF NOT EXISTS exports (
+    suite TEXT PRIMARY KEY,
+    worker TEXT NOT NULL,
+    output TEXT,
+    claimed_at REAL NOT NULL
+);
+"""
+
+
+class JobQueue:
+    """Durable SQLite work queue shared by worker processes
+
+    Workers lease one job at a time; a lease that is not renewed or completed
+    before it expires (e.g. the worker died) makes the job available again.
+    The database uses rollback journaling rather than WAL so it can live on a
+    network share reachable from several hosts.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A connection per operation keeps the queue safe to use from any thread
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, suite: str, test_cases: list) -> int:
+        """Add test cases to a suite, preserving their order; returns the count added"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT COALESCE(MAX(position), 0) FROM jobs WHERE suite = ?", (suite,)).fetchone()
+            start = row[0]
+            conn.executemany(
+                "INSERT INTO jobs (suite, position, test_case, enqueued_at) VALUES (?, ?, ?, ?)",
+                [(suite, start + i, json.dumps(test_case), now) for i, test_case in enumerate(test_cases, 1)],
+            )
+        return len(test_cases)
+
+    def lease(self, worker_id: str, suite: Optional[str] = None) -> Optional[dict]:
+        """Claim the next runnable job, or return None if nothing is available"""
+        now = time.time()
+        suite_filter = "AND suite = ?" if suite else ""
+        params = (suite,) if suite else ()
+
+        with self._transaction() as conn:
+            # Jobs whose workers keep dying are failed instead of retried forever
+            conn.execute(
+                f"""UPDATE jobs SET status = 'failed', finished_at = ?,
+                       error = 'Lease expired ' || attempts || ' times without a result'
+                    WHERE status = 'leased' AND lease_expires < ? AND attempts >= ? {suite_filter}""",
+                (now, now, self.max_attempts) + params,
+            )
+            row = conn.execute(
+                f"""SELECT * FROM jobs
+                    WHERE (status = 'queued' OR (status = 'leased' AND lease_expires < ?)) {suite_filter}
+                    ORDER BY position LIMIT 1""",
+                (now,) + params,
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                """UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?,
+                       attempts = attempts + 1, started_at = ?
+                    WHERE id = ?""",
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+
+        job = dict(row)
+        job["test_case"] = json.loads(job["test_case"])
+        job["attempts"] += 1
+        job["worker"] = worker_id
+        return job
+
+    def renew(self, job_id: int, worker_id: str) -> bool:
+        """Extend a lease held by `worker_id`; False if the lease was lost"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result_rows: list, status: str = "done") -> bool:
+        """Store a job's result rows; the first result recorded for a job wins"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = ?, worker = ?, result_rows = ?, finished_at = ?, lease_expires = NULL
+                    WHERE id = ? AND status NOT IN ('done', 'failed')""",
+                (status, worker_id, json.dumps(result_rows, default=str), time.time(), job_id),
+            )
+            return cursor.rowcount == 1
+
+    def counts(self, suite: Optional[str] = None) -> dict:
+        """Number of jobs per status"""
+        with self._connect() as conn:
+            if suite:
+                rows = conn.execute("SELECT status, COUNT(*) FROM jobs WHERE suite = ? GROUP BY status", (suite,))
+            else:
+                rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            return {status: count for status, count in rows}
+
+    def is_drained(self, suite: Optional[str] = None) -> bool:
+        counts = self.counts(suite)
+        return counts.get("queued", 0) == 0 and counts.get("leased", 0) == 0
+
+    def claim_export(self, suite: str, worker_id: str, output: str) -> Optional[dict]:
+        """Make `worker_id` the one worker that exports a drained suite
+
+        Returns None when the claim succeeds, otherwise the existing claim.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM exports WHERE suite = ?", (suite,)).fetchone()
+            if row is not None:
+                return dict(row)
+            conn.execute(
+                "INSERT INTO exports (suite, worker, output, claimed_at) VALUES (?, ?, ?, ?)",
+                (suite, worker_id, output, time.time()),
+            )
+        return None
+
+    def release_export(self, suite: str, worker_id: str):
+        """Drop a claim whose export failed so another worker can retry it"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM exports WHERE suite = ? AND worker = ?", (suite, worker_id))
+
+    def suites(self) -> list:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT suite FROM jobs ORDER BY suite")]
+
+    def finished_jobs(self, suite: str) -> list:
+        """Finished jobs of a suite in enqueue order"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE suite = ? AND status IN ('done', 'failed') ORDER BY position",
+                (suite,),
+            ).fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["test_case"] = json.loads(job["test_case"])
+            job["result_rows"] = json.loads(job["result_rows"]) if job["result_rows"] else []
+            jobs.append(job)
+        return jobs
@@ -0,0 +1,152 @@
+from core.history import HistoryStore
+import csv
+import glob
+import heapq
+import os
+import statistics
+from typing import Dict, List
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Used when a test has no history and nothing else is known
+DEFAULT_ESTIMATE_SEC = 10.0
+
+# Only the most recent runs count towards duration and failure estimates
+HISTORY_WINDOW = 10
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+ORDERINGS = ("file", "lpt", "priority")
+
+
+def load_history(pattern: str = "test_results_*.csv") -> Dict[str, dict]:
+    """Collect per-test durations and outcomes from previous results CSVs
+
+    Returns {test_id: {"durations": [...], "statuses": [...]}} with the
+    oldest run first (result files are named by timestamp).
+    """
+    history = {}
+    for path in sorted(glob.glob(pattern)):
+        runs = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    test_id = row.get('Test_ID')
+                    if not test_id:
+                        continue
+                    run = runs.setdefault(test_id, {"duration": 0.0, "total": None, "status": ""})
+                    try:
+                        run["duration"] += float(row.get('Execution_Time_Sec') or 0)
+                        # Wall time including parsing, when the file has it
+                        run["total"] = run["total"] or float(row.get('Test_Duration_Sec') or 0) or None
+                    except ValueError:
+                        pass
+                    run["status"] = run["status"] or (row.get('Overall_Test_Status') or "").lower()
+        except (OSError, csv.Error) as e:
+            logger.warning(f"⚠️  Skipping history file {path}: {e}")
+            continue
+
+        for test_id, run in runs.items():
+            entry = history.setdefault(test_id, {"durations": [], "statuses": []})
+            entry["durations"].append(run["total"] or run["duration"])
+            entry["statuses"].append(run["status"])
+
+    return history
+
+
+def summarize_history(history: Dict[str, dict]) -> Dict[str, dict]:
+    """Reduce raw history to estimated duration, failure rate and last status"""
+    stats = {}
+    for test_id, entry in history.items():
+        durations = entry["durations"][-HISTORY_WINDOW:]
+        statuses = entry["statuses"][-HISTORY_WINDOW:]
+        failures = sum(1 for status in statuses if status not in ("success", "partial"))
+        stats[test_id] = {
+            "estimate": statistics.median(durations) if durations else None,
+            "failure_rate": failures / len(statuses) if statuses else 0.0,
+            "recently_failed": bool(statuses) and statuses[-1] not in ("success", "partial"),
+            "runs": len(entry["statuses"]),
+        }
+    return stats
+
+
+def estimate_durations(test_cases: list, stats: Dict[str, dict]) -> List[float]:
+    """Estimated seconds per test case; unknown tests get the median known estimate"""
+    known = [s["estimate"] for s in stats.values() if s["estimate"]]
+    fallback = statistics.median(known) if known else DEFAULT_ESTIMATE_SEC
+    estimates = []
+    for test in test_cases:
+        entry = stats.get(test['number'])
+        estimates.append(entry["estimate"] if entry and entry["estimate"] else fallback)
+    return estimates
+
+
+def order_test_cases(test_cases: list, stats: Dict[str, dict], ordering: str = "file") -> list:
+    """Return test cases in execution order
+
+    - file: as listed
+    - lpt: longest estimated duration first, which keeps parallel workers
+      evenly loaded and minimises total suite time
+    - priority: High before Medium before Low, recently failing and flaky
+      tests first within a priority, then shortest first for fast feedback
+    """
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Unknown ordering '{ordering}', expected one of {', '.join(ORDERINGS)}")
+    if ordering == "file":
+        return list(test_cases)
+
+    estimates = dict(zip(map(id, test_cases), estimate_durations(test_cases, stats)))
+
+    if ordering == "lpt":
+        return sorted(test_cases, key=lambda test: -estimates[id(test)])
+
+    def priority_key(test):
+        entry = stats.get(test['number'], {})
+        return (
+            PRIORITY_RANK.get(str(test.get('priority', '')).lower(), len(PRIORITY_RANK)),
+            not entry.get("recently_failed", False),
+            -entry.get("failure_rate", 0.0),
+            estimates[id(test)],
+        )
+
+    return sorted(test_cases, key=priority_key)
+
+
+def predict_makespan(estimates: List[float], workers: int = 1) -> float:
+    """Suite wall time if `workers` each take the next test as soon as they are free"""
+    finish_times = [0.0] * max(1, workers)
+    for estimate in estimates:
+        earliest = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, earliest + estimate)
+    return max(finish_times)
+
+
+def plan_schedule(test_cases: list, ordering: str = "file", workers: int = 1,
+                  history_pattern: str = "test_results_*.csv", history_db: str = None):
+    """Order test cases from history; returns (ordered cases, estimates, predicted seconds)
+
+    With `history_db` pointing at an existing history store, new result CSVs
+    are imported into it and history is read from the index instead of
+    re-parsing every CSV.
+    """
+    if history_db and os.path.exists(history_db):
+        store = HistoryStore(history_db)
+        store.import_glob(history_pattern)
+        history = store.load_schedule_history(HISTORY_WINDOW)
+    else:
+        history = load_history(history_pattern)
+    stats = summarize_history(history)
+    ordered = order_test_cases(test_cases, stats, ordering)
+    estimates = estimate_durations(ordered, stats)
+    predicted = predict_makespan(estimates, workers)
+
+    known = sum(1 for test in ordered if test['number'] in stats)
+    logger.info(f"🗓️  Ordering: {ordering} | history for {known}/{len(ordered)} tests | "
+          f"predicted suite time: {predicted:.1f}s ({workers} worker{'s' if workers != 1 else ''})")
+    for test, estimate in zip(ordered, estimates):
+        entry = stats.get(test['number'])
+        fail_note = f", fail rate {entry['failure_rate']:.0%}" if entry else ", no history"
+        logger.info(f"   {test['number']} [{test.get('priority', '')}] ~{estimate:.1f}s{fail_note}")
+
+    return ordered, estimates, predicted
@@ -0,0 +1,270 @@
+from browser.watchdog import DEFAULT_MAX_TESTS, ManagedBrowser
+from core.workflow import run_test_async
+from utils.metrics import REGISTRY, TESTS_TOTAL
+from utils.logger import get_logger, log_context
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import asyncio
+import json
+import threading
+import uuid
+
+logger = get_logger(__name__)
+
+# Finished jobs kept in memory for polling before the oldest are dropped
+MAX_FINISHED_JOBS = 1000
+
+
+class TestServer:
+    """Runs tests on a warm browser inside a long-lived event loop
+
+    The browser is recycled after `max_tests_per_browser` tests, above
+    `max_browser_memory_mb`, or when a test runs past `test_timeout`
+    seconds (that test is errored, the others on it finish). It is
+    restarted at once if it crashes or stops answering.
+    """
+
+    def __init__(self, max_concurrency: int = 4, headless: bool = True,
+                 max_tests_per_browser: int = DEFAULT_MAX_TESTS, max_browser_memory_mb: float = None,
+                 test_timeout: float = None):
+        self.max_concurrency = max_concurrency
+        self.headless = headless
+        self.test_timeout = test_timeout
+        self.loop = asyncio.new_event_loop()
+        self.browsers = ManagedBrowser(headless=headless, max_tests=max_tests_per_browser,
+                                       max_memory_mb=max_browser_memory_mb)
+        self.semaphore = None
+        self.jobs = OrderedDict()
+        self.changed = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Start the event loop thread and launch the shared browser"""
+        self._thread = threading.Thread(target=self.loop.run_forever, name="test-server-loop", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_browser(), self.loop).result()
+
+    async def _start_browser(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        await self.browsers.start()
+
+    def stop(self):
+        """Close the shared browser and stop the event loop"""
+        asyncio.run_coroutine_threadsafe(self.browsers.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def submit(self, instruction: str = None, plan: list = None, test_name: str = None,
+               perf_budget: str = None, collect_performance: bool = False, batch_dom_actions: bool = False) -> dict:
+        """Queue a test for execution and return its job record"""
+        if not instruction and not plan:
+            raise ValueError("Either 'instruction' or 'plan' is required")
+        if plan is not None and not isinstance(plan, list):
+            raise ValueError("'plan' must be a list of steps")
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "test_name": test_name or "UI Test",
+            "instruction": instruction,
+            "plan": plan,
+            "perf_budget": perf_budget,
+            "collect_performance": bool(collect_performance),
+            "batch_dom_actions": bool(batch_dom_actions),
+            "steps": [],
+            "report": None,
+            "error": None,
+            "submitted_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "version": 0,
+        }
+        with self.changed:
+            self.jobs[job["id"]] = job
+            self._prune_jobs()
+        asyncio.run_coroutine_threadsafe(self._run_job(job), self.loop)
+        return self.get_job(job["id"])
+
+    def _prune_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] in ("done", "error")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _update(self, job: dict, **fields):
+        with self.changed:
+            job.update(fields)
+            job["version"] += 1
+            self.changed.notify_all()
+
+    async def _run_job(self, job: dict):
+        # Each job runs in its own task, so the log context stays per job
+        with log_context(test_id=job["id"][:8]):
+            await self._execute_job(job)
+
+    async def _execute_job(self, job: dict):
+        async with self.semaphore:
+            self._update(job, status="running")
+            try:
+                async with self.browsers.session() as session:
+                    report = await asyncio.wait_for(run_test_async(
+                        job["instruction"],
+                        plan=job["plan"],
+                        browser=session,
+                        perf_budget=job["perf_budget"],
+                        collect_performance=job["collect_performance"],
+                        batch_dom_actions=job["batch_dom_actions"],
+                        on_step=lambda step_result: self._update(job, steps=job["steps"] + [step_result]),
+                        test_name=job["test_name"],
+                    ), self.test_timeout)
+                report.peak_memory_mb = session.peak_memory_mb
+                self._update(job, status="done", report=report.model_dump(), finished_at=datetime.now().isoformat())
+            except asyncio.TimeoutError:
+                logger.error(f"❌ Job {job['id']} timed out after {self.test_timeout}s")
+                TESTS_TOTAL.inc(status="error")
+                self._update(job, status="error", error=f"Timed out after {self.test_timeout}s",
+                             finished_at=datetime.now().isoformat())
+            except Exception as e:
+                logger.exception(f"❌ Job {job['id']} failed: {e}")
+                TESTS_TOTAL.inc(status="error")
+                self._update(job, status="error", error=str(e), finished_at=datetime.now().isoformat())
+
+    def get_job(self, job_id: str) -> dict:
+        with self.changed:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> list:
+        with self.changed:
+            return [
+                {key: job[key] for key in ("id", "status", "test_name", "submitted_at", "finished_at")}
+                for job in self.jobs.values()
+            ]
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float = None) -> dict:
+        """Block until the job moves past `version` (or finishes), then return it"""
+        with self.changed:
+            self.changed.wait_for(
+                lambda: job_id not in self.jobs
+                or self.jobs[job_id]["version"] > version
+                or self.jobs[job_id]["status"] in ("done", "error"),
+                timeout=timeout,
+            )
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+
+class TestRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end for TestServer"""
+
+    server_version = "AIUITester"
+    test_server: TestServer = None
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["health"]:
+            self._send_json(200, {
+                "status": "ok",
+                "max_concurrency": self.test_server.max_concurrency,
+                "browser_restarts": self.test_server.browsers.restarts,
+            })
+        elif parts == ["metrics"]:
+            body = REGISTRY.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif parts == ["tests"]:
+            self._send_json(200, self.test_server.list_jobs())
+        elif len(parts) == 2 and parts[0] == "tests":
+            job = self.test_server.get_job(parts[1])
+            if job is None:
+                self._send_json(404, {"error": "Unknown job"})
+            else:
+                self._send_json(200, job)
+        elif len(parts) == 3 and parts[0] == "tests" and parts[2] == "stream":
+            self._stream(parts[1])
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/tests":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            job = self.test_server.submit(
+                instruction=payload.get("instruction"),
+                plan=payload.get("plan"),
+                test_name=payload.get("test_name"),
+                perf_budget=payload.get("perf_budget"),
+                collect_performance=payload.get("collect_performance", False),
+                batch_dom_actions=payload.get("batch_dom_actions", False),
+            )
+        except (ValueError, AttributeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        if parse_qs(url.query).get("wait", ["0"])[0] in ("1", "true"):
+            while job and job["status"] not in ("done", "error"):
+                job = self.test_server.wait_for_change(job["id"], job["version"])
+            self._send_json(200, job)
+        else:
+            self._send_json(202, job)
+
+    def _stream(self, job_id: str):
+        """Send one JSON line per job update until the job finishes"""
+        job = self.test_server.get_job(job_id)
+        if job is None:
+            self._send_json(404, {"error": "Unknown job"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        while job is not None:
+            self.wfile.write((json.dumps(job, default=str) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            if job["status"] in ("done", "error"):
+                break
+            job = self.test_server.wait_for_change(job_id, job["version"], timeout=30)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, max_concurrency: int = 4, headless: bool = True,
+          max_tests_per_browser: int = DEFAULT_MAX_TESTS, max_browser_memory_mb: float = None,
+          test_timeout: float = None):
+    """Start the test server and block until interrupted"""
+    test_server = TestServer(max_concurrency=max_concurrency, headless=headless,
+                             max_tests_per_browser=max_tests_per_browser,
+                             max_browser_memory_mb=max_browser_memory_mb, test_timeout=test_timeout)
+    test_server.start()
+
+    handler = type("BoundTestRequestHandler", (TestRequestHandler,), {"test_server": test_server})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"🚀 AI UI Tester server listening on http://{host}:{port} (max concurrency {max_concurrency})")
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Shutting down server")
+    finally:
+        httpd.server_close()
+        test_server.stop()
@@ -1,15 +1,22 @@
-from agents.parser import parse_test
+from agents.parser import parse_test_async
 from agents.planner import create_plan
-from agents.executor import execute_plan
-from agents.validator import validate_results
+from agents.executor import execute_plan_async
+from agents.validator import validate_results_async
+from utils.metrics import TESTS_TOTAL
+from utils.logger import get_logger, truncate_payload
+import asyncio
 import json
+import logging
 import re
 
-def run_test(prompt: str):
-    print(f"\n🔍 Parsing test instruction: {prompt}")
+logger = get_logger(__name__)
+
+async def build_plan_async(prompt: str) -> list:
+    """Parse a natural-language instruction into an execution plan"""
+    logger.info(f"🔍 Parsing test instruction: {prompt}")
     
     # Parse the test
-    parsed = parse_test(prompt)
+    parsed = await parse_test_async(prompt)
     
     # Try to extract JSON/list from the response
     try:
@@ -25,32 +32,63 @@ def run_test(prompt: str):
         
         steps = eval(cleaned)
     except Exception as e:
-        print(f"⚠️  Parsing error: {e}")
-        print(f"Raw response: {parsed}")
+        logger.warning(f"⚠️  Parsing error: {e}")
+        logger.warning(f"Raw response: {truncate_payload(parsed)}")
         # Fallback to simple parsing
         steps = [{"action": "error", "message": "Could not parse test steps"}]
     
-    print(f"✅ Parsed steps: {steps}\n")
+    logger.info(f"✅ Parsed {len(steps)} steps")
+    logger.debug(f"Parsed steps: {steps}")
     
     # Create execution plan
-    print("📋 Creating execution plan...")
     plan = create_plan(steps)
-    print(f"Plan: {plan}\n")
+    logger.info(f"📋 Plan: {' -> '.join(str(step['action']) for step in plan)}")
+    
+    return plan
+
+def build_plan(prompt: str) -> list:
+    """Sync wrapper for build_plan_async"""
+    return asyncio.run(build_plan_async(prompt))
+
+async def run_test_async(prompt: str = None, plan: list = None, browser=None, retry_policies: dict = None,
+                         perf_budget: str = None, collect_performance: bool = False, on_step=None,
+                         test_name: str = None, batch_dom_actions: bool = False):
+    """Parse (unless `plan` is given), execute and validate one test
+    
+    Runs entirely on the caller's event loop, so many tests can be awaited
+    concurrently; pass `browser` to execute on an existing browser session.
+    `batch_dom_actions` runs consecutive type/click steps in one page
+    evaluation (see execute_plan_async).
+    """
+    if plan is None:
+        plan = await build_plan_async(prompt)
+    else:
+        plan = create_plan(plan)
+    
+    # A performance budget (e.g. from the CSV) is checked once the plan has run
+    if perf_budget:
+        plan.append({'action': 'assert_perf', 'target': perf_budget, 'value': ''})
     
     # Execute the plan
-    print("🚀 Executing test plan...")
-    results = execute_plan(plan)
-    print(f"Results: {results}\n")
+    logger.info("🚀 Executing test plan...")
+    results = await execute_plan_async(plan, browser=browser, on_step=on_step, retry_policies=retry_policies,
+                                       collect_performance=collect_performance,
+                                       batch_dom_actions=batch_dom_actions)
+    if test_name:
+        results['test_name'] = test_name
+    
+    # Results can hold whole page texts; only render them when asked for
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Results: {truncate_payload(results)}")
     
     # Validate results
-    print("✔️  Validating results...")
-    report = validate_results(results)
+    report = await validate_results_async(results)
+    TESTS_TOTAL.inc(status=report.status)
     
-    # Convert report to dict for display
-    report_dict = report.model_dump()
-    print(f"\n📊 Final Report:")
-    print(f"   Status: {report_dict['status']}")
-    print(f"   Summary: {report_dict['summary']}")
-    print(f"   Timestamp: {report_dict['timestamp']}")
+    logger.info(f"📊 Final Report: {report.status} | {report.summary} | {report.timestamp}")
     
-    return report
\ No newline at end of file
+    return report
+
+def run_test(prompt: str, **options):
+    """Sync wrapper for run_test_async; see it for `options`"""
+    return asyncio.run(run_test_async(prompt, **options))
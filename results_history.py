@@ -0,0 +1,72 @@
+from core.history import DEFAULT_HISTORY_DB, HistoryStore
+from utils.logger import configure_logging
+import argparse
+import json
+import sys
+import time
+
+
+def _fmt(value, pattern="{:.2f}"):
+    return "-" if value is None else pattern.format(value)
+
+
+def print_stats(stats, label):
+    print(f"{label:<24} {'Runs':>6} {'Pass':>7} {'Flaky':>7} {'Flips':>7} {'p50 s':>8} {'p95 s':>8}")
+    for entry in sorted(stats, key=lambda s: s["key"]):
+        print(
+            f"{entry['key'][:24]:<24} {entry['runs']:>6} "
+            f"{_fmt(entry['pass_rate'], '{:.0%}'):>7} {_fmt(entry['flaky_rate'], '{:.0%}'):>7} "
+            f"{_fmt(entry.get('flip_rate'), '{:.0%}'):>7} "
+            f"{_fmt(entry['p50_sec']):>8} {_fmt(entry['p95_sec']):>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the indexed test results history")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_DB, help="History store path")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import existing results CSVs")
+    import_parser.add_argument("patterns", nargs="*", default=["test_results_*.csv"])
+
+    tests_parser = subparsers.add_parser("tests", help="Duration percentiles, pass rate and flakiness per test")
+    tests_parser.add_argument("test_id", nargs="?")
+    tests_parser.add_argument("--last", type=int, help="Only the most recent N runs of each test")
+
+    actions_parser = subparsers.add_parser("actions", help="Duration percentiles, pass rate and flakiness per action")
+    actions_parser.add_argument("action", nargs="?")
+    actions_parser.add_argument("--last", type=int, help="Only the most recent N steps of each action")
+
+    trend_parser = subparsers.add_parser("trend", help="Duration of a test's recent runs")
+    trend_parser.add_argument("test_id")
+    trend_parser.add_argument("--last", type=int, default=200)
+
+    args = parser.parse_args()
+    configure_logging(stream=sys.stderr)
+    store = HistoryStore(args.db)
+    query_start = time.perf_counter()
+
+    if args.command == "import":
+        imported = sum(store.import_glob(pattern) for pattern in args.patterns)
+        print(f"📥 Imported {imported} new results file(s) into {args.db}")
+        raise SystemExit(0)
+
+    if args.command == "tests":
+        result = store.test_stats(args.test_id, args.last)
+    elif args.command == "actions":
+        result = store.action_stats(args.action, args.last)
+    else:
+        result = store.duration_trend(args.test_id, args.last)
+    elapsed_ms = (time.perf_counter() - query_start) * 1000
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.command == "trend":
+        for run in result:
+            print(f"{run['started_at']}  {_fmt(run['duration_sec']):>8}s  {run['status']}")
+    else:
+        print_stats(result, "Test_ID" if args.command == "tests" else "Action")
+
+    if not args.json:
+        print(f"\n⏱️  {len(result)} row(s) in {elapsed_ms:.1f} ms")
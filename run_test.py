@@ -1,6 +1,9 @@
 from core.workflow import run_test
+from utils.logger import configure_logging
 import json
 
+configure_logging()
+
 prompt = input("Enter Test Instruction:\n")
 
 report = run_test(prompt)
@@ -7,10 +7,14 @@ class StepResult(BaseModel):
     error: Optional[str] = None
     screenshot: Optional[str] = None
     data: Optional[Any] = None
+    attempts: int = 1
+    attempt_durations: List[float] = []  # Seconds per attempt
+    performance: Optional[Dict[str, Any]] = None  # Page timings, bytes, requests, heap
 
 class TestReport(BaseModel):
     test_name: str
     status: str
     steps: List[StepResult]
     summary: str
-    timestamp: str
\ No newline at end of file
+    timestamp: str
+    peak_memory_mb: Optional[float] = None  # Browser + driver RSS, when run on a managed browser
\ No newline at end of file
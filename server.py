@@ -0,0 +1,22 @@
+from browser.watchdog import DEFAULT_MAX_TESTS
+from core.server import serve
+from utils.logger import configure_logging
+import argparse
+
+parser = argparse.ArgumentParser(description="Run AI UI Tester as a long-lived HTTP service")
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--port", type=int, default=8765)
+parser.add_argument("--max-concurrency", type=int, default=4, help="Tests executed at the same time")
+parser.add_argument("--headed", action="store_true", help="Show the browser window")
+parser.add_argument("--recycle-after", type=int, default=DEFAULT_MAX_TESTS,
+                    help="Replace the browser after this many tests (0: never)")
+parser.add_argument("--max-browser-mb", type=float, help="Replace the browser when it uses more memory than this")
+parser.add_argument("--test-timeout", type=float, help="Error a test and restart the browser after this many seconds")
+parser.add_argument("--log-level", help="Log level (default: LOG_LEVEL or INFO)")
+parser.add_argument("--log-json", action="store_true", default=None, help="Emit JSON log lines")
+args = parser.parse_args()
+configure_logging(args.log_level, args.log_json)
+
+serve(host=args.host, port=args.port, max_concurrency=args.max_concurrency, headless=not args.headed,
+      max_tests_per_browser=args.recycle_after, max_browser_memory_mb=args.max_browser_mb,
+      test_timeout=args.test_timeout)
@@ -1,8 +1,11 @@
 from core.workflow import run_test
+from utils.logger import configure_logging, get_logger
 import csv
 from datetime import datetime
 import os
 
+logger = get_logger("runner")
+
 test_cases = [
     {
         "name": "Simple Navigation",
@@ -27,9 +30,9 @@ test_cases = [
 ]
 
 def run_all_tests():
-    print("=" * 60)
-    print("🧪 Running AI UI Tester Test Suite")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("🧪 Running AI UI Tester Test Suite")
+    logger.info("=" * 60)
     
     # Prepare CSV file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -60,9 +63,9 @@ def run_all_tests():
     failed = 0
     
     for i, test in enumerate(test_cases, 1):
-        print(f"\n📋 Test {i}/{len(test_cases)}: {test['name']}")
-        print(f"Input: {test['input']}")
-        print("-" * 60)
+        logger.info(f"📋 Test {i}/{len(test_cases)}: {test['name']}")
+        logger.info(f"Input: {test['input']}")
+        logger.info("-" * 60)
         
         try:
             report = run_test(test['input'])
@@ -108,18 +111,18 @@ def run_all_tests():
             
             # Check if test passed
             if report.status in ['success', 'partial']:
-                print(f"✅ Test PASSED: {test['name']}")
-                print(f"   Status: {report.status}")
-                print(f"   Summary: {report.summary}")
+                logger.info(f"✅ Test PASSED: {test['name']}")
+                logger.info(f"   Status: {report.status}")
+                logger.info(f"   Summary: {report.summary}")
                 passed += 1
             else:
-                print(f"⚠️  Test COMPLETED with status: {report.status}")
-                print(f"   Summary: {report.summary}")
+                logger.info(f"⚠️  Test COMPLETED with status: {report.status}")
+                logger.info(f"   Summary: {report.summary}")
                 passed += 1
             
         except Exception as e:
-            print(f"❌ Test FAILED: {test['name']}")
-            print(f"   Error: {str(e)}")
+            logger.error(f"❌ Test FAILED: {test['name']}")
+            logger.error(f"   Error: {str(e)}")
             
             # Add error row to CSV
             row = {
@@ -144,10 +147,9 @@ def run_all_tests():
             
             failed += 1
             
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Unhandled error in test {i}")
         
-        print("-" * 60)
+        logger.info("-" * 60)
     
     # Write to CSV
     if csv_rows:
@@ -156,17 +158,18 @@ def run_all_tests():
             writer.writeheader()
             writer.writerows(csv_rows)
         
-        print(f"\n📄 Test results saved to: {csv_filename}")
-        print(f"   Total rows: {len(csv_rows)}")
-        print(f"   Location: {os.path.abspath(csv_filename)}")
+        logger.info(f"📄 Test results saved to: {csv_filename}")
+        logger.info(f"   Total rows: {len(csv_rows)}")
+        logger.info(f"   Location: {os.path.abspath(csv_filename)}")
     
     # Print summary
-    print("\n" + "=" * 60)
-    print(f"📊 Test Summary: {passed} passed, {failed} failed out of {len(test_cases)} tests")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info(f"📊 Test Summary: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+    logger.info("=" * 60)
     
     return csv_filename
 
 if __name__ == "__main__":
+    configure_logging()
     result_file = run_all_tests()
-    print(f"\n✅ All tests completed! Results saved to: {result_file}")
\ No newline at end of file
+    logger.info(f"✅ All tests completed! Results saved to: {result_file}")
\ No newline at end of file
@@ -1,4 +1,7 @@
 from core.workflow import run_test
+from utils.logger import configure_logging, get_logger
+
+logger = get_logger("runner")
 
 test_cases = [
     {
@@ -24,44 +27,44 @@ test_cases = [
 ]
 
 def run_all_tests():
-    print("=" * 60)
-    print("🧪 Running AI UI Tester Test Suite")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("🧪 Running AI UI Tester Test Suite")
+    logger.info("=" * 60)
     
     passed = 0
     failed = 0
     
     for i, test in enumerate(test_cases, 1):
-        print(f"\n📋 Test {i}/{len(test_cases)}: {test['name']}")
-        print(f"Input: {test['input']}")
-        print("-" * 60)
+        logger.info(f"📋 Test {i}/{len(test_cases)}: {test['name']}")
+        logger.info(f"Input: {test['input']}")
+        logger.info("-" * 60)
         
         try:
             report = run_test(test['input'])
             
             # Check if test passed
             if report.status in ['success', 'partial']:
-                print(f"✅ Test PASSED: {test['name']}")
-                print(f"   Status: {report.status}")
-                print(f"   Summary: {report.summary}")
+                logger.info(f"✅ Test PASSED: {test['name']}")
+                logger.info(f"   Status: {report.status}")
+                logger.info(f"   Summary: {report.summary}")
                 passed += 1
             else:
-                print(f"⚠️  Test COMPLETED with status: {report.status}")
-                print(f"   Summary: {report.summary}")
+                logger.info(f"⚠️  Test COMPLETED with status: {report.status}")
+                logger.info(f"   Summary: {report.summary}")
                 passed += 1
             
         except Exception as e:
-            print(f"❌ Test FAILED: {test['name']}")
-            print(f"   Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"❌ Test FAILED: {test['name']}")
+            logger.error(f"   Error: {str(e)}")
+            logger.exception(f"Unhandled error in test {i}")
             failed += 1
         
-        print("-" * 60)
+        logger.info("-" * 60)
     
-    print("\n" + "=" * 60)
-    print(f"📊 Test Summary: {passed} passed, {failed} failed out of {len(test_cases)} tests")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info(f"📊 Test Summary: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+    logger.info("=" * 60)
 
 if __name__ == "__main__":
+    configure_logging()
     run_all_tests()
\ No newline at end of file
@@ -1,43 +1,76 @@
-from core.workflow import run_test
+from core.workflow import run_test_async
+from agents.executor import resolve_retry_policies
+from core.job_queue import JobQueue
+from core.scheduler import ORDERINGS, plan_schedule
+from core.history import DEFAULT_HISTORY_DB, HistoryStore
+from browser.watchdog import ManagedBrowser
+from utils.metrics import TESTS_TOTAL, start_from_env
+from utils.logger import configure_logging, get_logger, log_context
 import csv
+import glob
+import itertools
 from datetime import datetime
 import os
 import json
+import asyncio
 
-def load_test_cases_from_csv(csv_filename="test_cases.csv"):
-    """Load test cases from CSV file"""
-    test_cases = []
+logger = get_logger("runner")
+
+def _test_case_from_row(row):
+    """Convert one input CSV row to a test case dict"""
+    # Parse expected_actions (comma-separated string to list)
+    expected_actions = row['expected_actions'].split(',') if row['expected_actions'] else []
+    expected_actions = [action.strip() for action in expected_actions]
     
-    try:
-        with open(csv_filename, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
-                # Parse expected_actions (comma-separated string to list)
-                expected_actions = row['expected_actions'].split(',') if row['expected_actions'] else []
-                expected_actions = [action.strip() for action in expected_actions]
-                
-                test_case = {
-                    "number": row.get('test_case_number', 'N/A'),
-                    "name": row.get('test_case_name', 'Unnamed Test'),
-                    "priority": row.get('priority', 'Medium'),
-                    "category": row.get('category', 'General'),
-                    "input": row.get('input', ''),
-                    "expected_actions": expected_actions
-                }
-                
-                test_cases.append(test_case)
-        
-        print(f"✅ Loaded {len(test_cases)} test cases from {csv_filename}")
-        return test_cases
-        
-    except FileNotFoundError:
-        print(f"❌ Error: File '{csv_filename}' not found!")
-        print(f"   Please generate it first by running: python generate_sample_test_cases.py")
-        return []
-    except Exception as e:
-        print(f"❌ Error loading test cases: {e}")
-        return []
+    return {
+        "number": row.get('test_case_number', 'N/A'),
+        "name": row.get('test_case_name', 'Unnamed Test'),
+        "priority": row.get('priority', 'Medium'),
+        "category": row.get('category', 'General'),
+        "input": row.get('input', ''),
+        "expected_actions": expected_actions,
+        "performance_budget": (row.get('performance_budget') or '').strip()
+    }
+
+def _expand_sources(sources):
+    """Paths for a CSV path, glob, or list of them, in the order given"""
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        matches = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+        if not matches:
+            logger.warning(f"⚠️  No files match '{source}'")
+        paths.extend(matches)
+    return paths
+
+def iter_test_cases(sources="test_cases.csv"):
+    """Yield test cases one row at a time from one or more CSV files or globs
+    
+    Nothing is read ahead, so a run can start on the first row of a huge
+    file. Unreadable files are reported and skipped.
+    """
+    for csv_filename in _expand_sources(sources):
+        count = 0
+        try:
+            with open(csv_filename, 'r', encoding='utf-8') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    count += 1
+                    yield _test_case_from_row(row)
+            logger.info(f"✅ Loaded {count} test cases from {csv_filename}")
+        except FileNotFoundError:
+            logger.error(f"❌ Error: File '{csv_filename}' not found!")
+            logger.error(f"   Please generate it first by running: python generate_sample_test_cases.py")
+        except Exception as e:
+            logger.error(f"❌ Error loading test cases from {csv_filename} (after {count} rows): {e}")
+
+def load_test_cases_from_csv(csv_filename="test_cases.csv"):
+    """Load test cases from CSV file(s) into a list"""
+    return list(iter_test_cases(csv_filename))
+
+def dedupe_key(test):
+    """Tests with the same key run identically, so one execution can serve all of them"""
+    return (test['input'].strip(), test.get('performance_budget', ''))
 
 def format_data_preview(data, max_length=100):
     """Format data for CSV display"""
@@ -53,259 +86,438 @@ def format_data_preview(data, max_length=100):
     data_str = str(data)
     return data_str[:max_length] + ("..." if len(data_str) > max_length else "")
 
-def run_all_tests(input_csv="test_cases.csv"):
-    print("=" * 80)
-    print("🧪 Running AI UI Tester Test Suite")
-    print("=" * 80)
+# Enhanced CSV headers for results
+CSV_HEADERS = [
+    "Test_ID",
+    "Test_Case_Name",
+    "Test_Category",
+    "Test_Priority",
+    "Test_Input",
+    "Expected_Actions",
+    "Step_Number",
+    "Step_Action",
+    "Step_Target",
+    "Step_Value",
+    "Step_Status",
+    "Step_Result",
+    "Execution_Time_Sec",
+    "Test_Duration_Sec",
+    "Step_Attempts",
+    "Step_Flaky",
+    "Extracted_Data_Preview",
+    "Extracted_Data_Count",
+    "Error_Message",
+    "Error_Type",
+    "Screenshot_Path",
+    "Performance_Metrics",
+    "Peak_Memory_MB",
+    "Overall_Test_Status",
+    "Test_Summary",
+    "Total_Steps",
+    "Passed_Steps",
+    "Failed_Steps",
+    "Test_Start_Time",
+    "Test_End_Time",
+    "Miscellaneous_Notes"
+]
+
+def build_result_rows(test, report, test_start_time, test_end_time, reused_from=None):
+    """Build one results CSV row per step of a finished test
     
-    # Load test cases from CSV
-    test_cases = load_test_cases_from_csv(input_csv)
+    `reused_from` names the test whose execution produced `report` when it
+    is shared between tests with identical input.
+    """
+    test_id = test['number']
+    rows = []
+    
+    # Calculate statistics
+    total_steps = len(report.steps)
+    passed_steps = sum(1 for s in report.steps if s.status == "success")
+    failed_steps = sum(1 for s in report.steps if s.status == "failed")
+    
+    # Extract report data
+    test_status = report.status
+    test_summary = report.summary
+    
+    # Process each step
+    for step_num, step_result in enumerate(report.steps, 1):
+        step_data = step_result.step
+        
+        # Measured time of the step's attempts; older reports only allow an approximation
+        if step_result.attempt_durations:
+            step_time = sum(step_result.attempt_durations)
+        else:
+            step_time = (test_end_time - test_start_time).total_seconds() / total_steps
+        
+        # Extract and format data
+        extracted_count = 0
+        extracted_preview = ""
+        if step_result.data:
+            if isinstance(step_result.data, list):
+                extracted_count = len(step_result.data)
+                extracted_preview = format_data_preview(step_result.data)
+            else:
+                extracted_preview = format_data_preview(step_result.data)
+        
+        # Determine error type
+        error_type = ""
+        if step_result.error:
+            if "timeout" in step_result.error.lower():
+                error_type = "Timeout"
+            elif "not found" in step_result.error.lower():
+                error_type = "Element Not Found"
+            elif "network" in step_result.error.lower():
+                error_type = "Network Error"
+            else:
+                error_type = "General Error"
+        
+        # Miscellaneous notes
+        misc_notes = []
+        if step_num == 1:
+            misc_notes.append(f"Expected: {', '.join(test['expected_actions'])}")
+            if reused_from:
+                misc_notes.append(f"Result reused from {reused_from} (identical input)")
+        if step_result.status == "skipped":
+            misc_notes.append("Step was skipped")
+        if extracted_count > 100:
+            misc_notes.append(f"Large dataset extracted ({extracted_count} items)")
+        
+        # Passed only after retrying on the same page
+        flaky = step_result.status == "success" and step_result.attempts > 1
+        if flaky:
+            misc_notes.append(f"Passed on attempt {step_result.attempts}")
+        
+        # Validate if action matches expected
+        step_action = step_data.get('action', 'N/A')
+        if step_action in test['expected_actions']:
+            misc_notes.append(f"✓ Action matched expected")
+        
+        # Create row for this step
+        row = {
+            "Test_ID": test_id,
+            "Test_Case_Name": test['name'],
+            "Test_Category": test['category'],
+            "Test_Priority": test['priority'],
+            "Test_Input": test['input'],
+            "Expected_Actions": ', '.join(test['expected_actions']),
+            "Step_Number": step_num,
+            "Step_Action": step_action,
+            "Step_Target": step_data.get('target', 'N/A'),
+            "Step_Value": step_data.get('value', 'N/A'),
+            "Step_Status": step_result.status,
+            "Step_Result": "✅ PASS" if step_result.status == "success" else "❌ FAIL" if step_result.status == "failed" else "⊘ SKIP",
+            "Execution_Time_Sec": f"{step_time:.3f}",
+            "Test_Duration_Sec": f"{(test_end_time - test_start_time).total_seconds():.3f}" if step_num == 1 else "",
+            "Step_Attempts": step_result.attempts,
+            "Step_Flaky": "Yes" if flaky else "",
+            "Extracted_Data_Preview": extracted_preview,
+            "Extracted_Data_Count": extracted_count if extracted_count else "",
+            "Error_Message": step_result.error if step_result.error else "",
+            "Error_Type": error_type,
+            "Screenshot_Path": step_result.screenshot if step_result.screenshot else "",
+            "Performance_Metrics": json.dumps(step_result.performance) if step_result.performance else "",
+            "Peak_Memory_MB": report.peak_memory_mb if step_num == 1 and report.peak_memory_mb else "",
+            "Overall_Test_Status": test_status.upper(),
+            "Test_Summary": test_summary if step_num == 1 else "",
+            "Total_Steps": total_steps if step_num == 1 else "",
+            "Passed_Steps": passed_steps if step_num == 1 else "",
+            "Failed_Steps": failed_steps if step_num == 1 else "",
+            "Test_Start_Time": test_start_time.strftime("%Y-%m-%d %H:%M:%S") if step_num == 1 else "",
+            "Test_End_Time": test_end_time.strftime("%Y-%m-%d %H:%M:%S") if step_num == 1 else "",
+            "Miscellaneous_Notes": " | ".join(misc_notes)
+        }
+        
+        rows.append(row)
+    
+    return rows
+
+def build_error_row(test, error, test_start_time, test_end_time):
+    """Build the results CSV row for a test that raised before producing a report"""
+    test_id = test['number']
+    row = {
+        "Test_ID": test_id,
+        "Test_Case_Name": test['name'],
+        "Test_Category": test['category'],
+        "Test_Priority": test['priority'],
+        "Test_Input": test['input'],
+        "Expected_Actions": ', '.join(test['expected_actions']),
+        "Step_Number": 0,
+        "Step_Action": "ERROR",
+        "Step_Target": "N/A",
+        "Step_Value": "N/A",
+        "Step_Status": "failed",
+        "Step_Result": "❌ FAIL",
+        "Execution_Time_Sec": f"{(test_end_time - test_start_time).total_seconds():.2f}",
+        "Test_Duration_Sec": f"{(test_end_time - test_start_time).total_seconds():.3f}",
+        "Step_Attempts": "",
+        "Step_Flaky": "",
+        "Extracted_Data_Preview": "",
+        "Extracted_Data_Count": "",
+        "Error_Message": str(error),
+        "Error_Type": "Test Execution Error",
+        "Screenshot_Path": "",
+        "Performance_Metrics": "",
+        "Peak_Memory_MB": "",
+        "Overall_Test_Status": "FAILED",
+        "Test_Summary": f"Test execution failed: {str(error)}",
+        "Total_Steps": 0,
+        "Passed_Steps": 0,
+        "Failed_Steps": 0,
+        "Test_Start_Time": test_start_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "Test_End_Time": test_end_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "Miscellaneous_Notes": f"Exception: {type(error).__name__}"
+    }
+    return row
+
+def write_results_csv(csv_rows, output_csv):
+    """Write results rows to CSV"""
+    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        writer.writerows(csv_rows)
+
+async def run_all_tests_async(input_csv="test_cases.csv", order="file", retry_policies=None,
+                              history_db=DEFAULT_HISTORY_DB, collect_performance=False,
+                              recycle_after=1, max_browser_mb=None, test_timeout=None, dedupe=False,
+                              batch_dom_actions=False):
+    """Run the suite on the caller's event loop
+    
+    `input_csv` may be a path, a glob or a list of them. In file order, test
+    cases are streamed and run as they are read; other orders need the whole
+    suite up front. Tests share a browser that is replaced every
+    `recycle_after` tests (1: a fresh browser per test), above
+    `max_browser_mb`, on a crash, or when a test runs longer than
+    `test_timeout` seconds. With `dedupe`, tests whose input (and
+    performance budget) repeat an earlier test's reuse its report instead of
+    being parsed and executed again. `batch_dom_actions` runs consecutive
+    type/click steps in one page evaluation.
+    """
+    logger.info("=" * 80)
+    logger.info("🧪 Running AI UI Tester Test Suite")
+    logger.info("=" * 80)
+    
+    if order == "file":
+        # Stream: the first test starts before the rest of the file is read
+        test_cases = iter_test_cases(input_csv)
+        first = next(test_cases, None)
+        test_cases = itertools.chain([first], test_cases) if first else []
+        total_label = ""
+        predicted_time = None
+    else:
+        # Order from previous results (durations / failures)
+        test_cases, _, predicted_time = plan_schedule(load_test_cases_from_csv(input_csv), order,
+                                                      history_db=history_db)
+        total_label = f"/{len(test_cases)}"
     
     if not test_cases:
-        print("⚠️  No test cases to run. Exiting.")
+        logger.info("⚠️  No test cases to run. Exiting.")
         return None
     
     # Prepare output CSV file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_csv = f"test_results_{timestamp}.csv"
     
-    # Enhanced CSV headers for results
-    csv_headers = [
-        "Test_ID",
-        "Test_Case_Name",
-        "Test_Category",
-        "Test_Priority",
-        "Test_Input",
-        "Expected_Actions",
-        "Step_Number",
-        "Step_Action",
-        "Step_Target",
-        "Step_Value",
-        "Step_Status",
-        "Step_Result",
-        "Execution_Time_Sec",
-        "Extracted_Data_Preview",
-        "Extracted_Data_Count",
-        "Error_Message",
-        "Error_Type",
-        "Screenshot_Path",
-        "Overall_Test_Status",
-        "Test_Summary",
-        "Total_Steps",
-        "Passed_Steps",
-        "Failed_Steps",
-        "Test_Start_Time",
-        "Test_End_Time",
-        "Miscellaneous_Notes"
-    ]
-    
     csv_rows = []
     passed = 0
     failed = 0
     skipped = 0
+    flaky_steps = 0
     test_suite_start = datetime.now()
+    reused = 0
+    total_tests = 0
+    # dedupe_key -> (test ID, report, start time, end time) of the run being reused
+    executed = {}
+    browsers = ManagedBrowser(headless=False, max_tests=recycle_after, max_memory_mb=max_browser_mb)
     
     for i, test in enumerate(test_cases, 1):
+        total_tests = i
         test_id = test['number']
-        print(f"\n📋 Test {i}/{len(test_cases)}: {test_id} - {test['name']}")
-        print(f"   Category: {test['category']} | Priority: {test['priority']}")
-        print(f"   Input: {test['input']}")
-        print(f"   Expected Actions: {', '.join(test['expected_actions'])}")
-        print("-" * 80)
+        logger.info(f"📋 Test {i}{total_label}: {test_id} - {test['name']}")
+        logger.info(f"   Category: {test['category']} | Priority: {test['priority']}")
+        logger.info(f"   Input: {test['input']}")
+        logger.info(f"   Expected Actions: {', '.join(test['expected_actions'])}")
+        logger.info("-" * 80)
         
         if not test['input']:
-            print(f"⊘ SKIPPED: No input provided for test case")
+            logger.info(f"⊘ SKIPPED: No input provided for test case")
+            TESTS_TOTAL.inc(status="skipped")
             skipped += 1
             continue
         
         test_start_time = datetime.now()
+        key = dedupe_key(test)
         
         try:
-            report = run_test(test['input'])
+            if dedupe and key in executed:
+                reused_from, report, test_start_time, test_end_time = executed[key]
+                logger.info(f"♻️  Identical input to {reused_from}; reusing its result")
+                reused += 1
+                csv_rows.extend(build_result_rows(test, report, test_start_time, test_end_time, reused_from))
+                if report.status in ['success', 'partial']:
+                    passed += 1
+                else:
+                    failed += 1
+                logger.info("-" * 80)
+                continue
+            
+            with log_context(test_id=test_id):
+                async with browsers.session() as session:
+                    report = await asyncio.wait_for(
+                        run_test_async(test['input'], browser=session, retry_policies=retry_policies,
+                                       perf_budget=test.get('performance_budget'),
+                                       collect_performance=collect_performance,
+                                       batch_dom_actions=batch_dom_actions),
+                        test_timeout
+                    )
+                report.peak_memory_mb = session.peak_memory_mb
             test_end_time = datetime.now()
+            if dedupe:
+                executed[key] = (test_id, report, test_start_time, test_end_time)
             
-            # Calculate statistics
+            csv_rows.extend(build_result_rows(test, report, test_start_time, test_end_time))
             total_steps = len(report.steps)
             passed_steps = sum(1 for s in report.steps if s.status == "success")
-            failed_steps = sum(1 for s in report.steps if s.status == "failed")
-            
-            # Extract report data
-            test_status = report.status
-            test_summary = report.summary
-            
-            # Process each step
-            for step_num, step_result in enumerate(report.steps, 1):
-                step_data = step_result.step
-                
-                # Calculate step execution time (approximate)
-                step_time = (test_end_time - test_start_time).total_seconds() / total_steps
-                
-                # Extract and format data
-                extracted_count = 0
-                extracted_preview = ""
-                if step_result.data:
-                    if isinstance(step_result.data, list):
-                        extracted_count = len(step_result.data)
-                        extracted_preview = format_data_preview(step_result.data)
-                    else:
-                        extracted_preview = format_data_preview(step_result.data)
-                
-                # Determine error type
-                error_type = ""
-                if step_result.error:
-                    if "timeout" in step_result.error.lower():
-                        error_type = "Timeout"
-                    elif "not found" in step_result.error.lower():
-                        error_type = "Element Not Found"
-                    elif "network" in step_result.error.lower():
-                        error_type = "Network Error"
-                    else:
-                        error_type = "General Error"
-                
-                # Miscellaneous notes
-                misc_notes = []
-                if step_num == 1:
-                    misc_notes.append(f"Expected: {', '.join(test['expected_actions'])}")
-                if step_result.status == "skipped":
-                    misc_notes.append("Step was skipped")
-                if extracted_count > 100:
-                    misc_notes.append(f"Large dataset extracted ({extracted_count} items)")
-                
-                # Validate if action matches expected
-                step_action = step_data.get('action', 'N/A')
-                if step_action in test['expected_actions']:
-                    misc_notes.append(f"✓ Action matched expected")
-                
-                # Create row for this step
-                row = {
-                    "Test_ID": test_id,
-                    "Test_Case_Name": test['name'],
-                    "Test_Category": test['category'],
-                    "Test_Priority": test['priority'],
-                    "Test_Input": test['input'],
-                    "Expected_Actions": ', '.join(test['expected_actions']),
-                    "Step_Number": step_num,
-                    "Step_Action": step_action,
-                    "Step_Target": step_data.get('target', 'N/A'),
-                    "Step_Value": step_data.get('value', 'N/A'),
-                    "Step_Status": step_result.status,
-                    "Step_Result": "✅ PASS" if step_result.status == "success" else "❌ FAIL" if step_result.status == "failed" else "⊘ SKIP",
-                    "Execution_Time_Sec": f"{step_time:.2f}",
-                    "Extracted_Data_Preview": extracted_preview,
-                    "Extracted_Data_Count": extracted_count if extracted_count else "",
-                    "Error_Message": step_result.error if step_result.error else "",
-                    "Error_Type": error_type,
-                    "Screenshot_Path": step_result.screenshot if step_result.screenshot else "",
-                    "Overall_Test_Status": test_status.upper(),
-                    "Test_Summary": test_summary if step_num == 1 else "",
-                    "Total_Steps": total_steps if step_num == 1 else "",
-                    "Passed_Steps": passed_steps if step_num == 1 else "",
-                    "Failed_Steps": failed_steps if step_num == 1 else "",
-                    "Test_Start_Time": test_start_time.strftime("%Y-%m-%d %H:%M:%S") if step_num == 1 else "",
-                    "Test_End_Time": test_end_time.strftime("%Y-%m-%d %H:%M:%S") if step_num == 1 else "",
-                    "Miscellaneous_Notes": " | ".join(misc_notes)
-                }
-                
-                csv_rows.append(row)
+            flaky_steps += sum(1 for s in report.steps if s.status == "success" and s.attempts > 1)
             
             # Check if test passed
             if report.status in ['success', 'partial']:
-                print(f"✅ Test PASSED: {test['name']}")
-                print(f"   Status: {report.status} | Steps: {passed_steps}/{total_steps} passed")
+                logger.info(f"✅ Test PASSED: {test['name']}")
+                logger.info(f"   Status: {report.status} | Steps: {passed_steps}/{total_steps} passed")
                 passed += 1
             else:
-                print(f"❌ Test FAILED: {test['name']}")
-                print(f"   Status: {report.status} | Steps: {passed_steps}/{total_steps} passed")
+                logger.info(f"❌ Test FAILED: {test['name']}")
+                logger.info(f"   Status: {report.status} | Steps: {passed_steps}/{total_steps} passed")
                 failed += 1
             
         except Exception as e:
             test_end_time = datetime.now()
-            print(f"❌ Test FAILED: {test['name']}")
-            print(f"   Error: {str(e)}")
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"Test timed out after {test_timeout}s")
+            logger.error(f"❌ Test FAILED: {test['name']}")
+            logger.error(f"   Error: {str(e)}")
             
             # Add error row to CSV
-            row = {
-                "Test_ID": test_id,
-                "Test_Case_Name": test['name'],
-                "Test_Category": test['category'],
-                "Test_Priority": test['priority'],
-                "Test_Input": test['input'],
-                "Expected_Actions": ', '.join(test['expected_actions']),
-                "Step_Number": 0,
-                "Step_Action": "ERROR",
-                "Step_Target": "N/A",
-                "Step_Value": "N/A",
-                "Step_Status": "failed",
-                "Step_Result": "❌ FAIL",
-                "Execution_Time_Sec": f"{(test_end_time - test_start_time).total_seconds():.2f}",
-                "Extracted_Data_Preview": "",
-                "Extracted_Data_Count": "",
-                "Error_Message": str(e),
-                "Error_Type": "Test Execution Error",
-                "Screenshot_Path": "",
-                "Overall_Test_Status": "FAILED",
-                "Test_Summary": f"Test execution failed: {str(e)}",
-                "Total_Steps": 0,
-                "Passed_Steps": 0,
-                "Failed_Steps": 0,
-                "Test_Start_Time": test_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "Test_End_Time": test_end_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "Miscellaneous_Notes": f"Exception: {type(e).__name__}"
-            }
+            row = build_error_row(test, e, test_start_time, test_end_time)
             csv_rows.append(row)
+            TESTS_TOTAL.inc(status="error")
             
             failed += 1
-            
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Unhandled error in {test_id}")
         
-        print("-" * 80)
+        logger.info("-" * 80)
     
+    await browsers.close()
     test_suite_end = datetime.now()
     
     # Write to CSV
     if csv_rows:
-        with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=csv_headers)
-            writer.writeheader()
-            writer.writerows(csv_rows)
+        write_results_csv(csv_rows, output_csv)
+        if history_db:
+            HistoryStore(history_db).ingest_rows(output_csv, csv_rows)
         
         file_size = os.path.getsize(output_csv) / 1024  # KB
         
-        print(f"\n📄 Test results exported to CSV:")
-        print(f"   File: {output_csv}")
-        print(f"   Location: {os.path.abspath(output_csv)}")
-        print(f"   Total rows: {len(csv_rows)} (excluding header)")
-        print(f"   File size: {file_size:.2f} KB")
+        logger.info(f"📄 Test results exported to CSV:")
+        logger.info(f"   File: {output_csv}")
+        logger.info(f"   Location: {os.path.abspath(output_csv)}")
+        logger.info(f"   Total rows: {len(csv_rows)} (excluding header)")
+        logger.info(f"   File size: {file_size:.2f} KB")
     
     # Print summary
     total_time = (test_suite_end - test_suite_start).total_seconds()
-    total_tests = len(test_cases)
     
-    print("\n" + "=" * 80)
-    print(f"📊 Test Suite Summary:")
-    print(f"   Total Tests: {total_tests}")
-    print(f"   Passed: {passed} ({(passed/total_tests*100):.1f}%)")
-    print(f"   Failed: {failed} ({(failed/total_tests*100):.1f}%)")
-    print(f"   Skipped: {skipped} ({(skipped/total_tests*100):.1f}%)" if skipped > 0 else "")
-    print(f"   Success Rate: {(passed/total_tests*100):.1f}%")
-    print(f"   Total Execution Time: {total_time:.2f} seconds")
-    print(f"   Average Time per Test: {(total_time/total_tests):.2f} seconds")
-    print("=" * 80)
+    logger.info("=" * 80)
+    logger.info(f"📊 Test Suite Summary:")
+    logger.info(f"   Total Tests: {total_tests}")
+    logger.info(f"   Passed: {passed} ({(passed/total_tests*100):.1f}%)")
+    logger.info(f"   Failed: {failed} ({(failed/total_tests*100):.1f}%)")
+    if skipped > 0:
+        logger.info(f"   Skipped: {skipped} ({(skipped/total_tests*100):.1f}%)")
+    logger.info(f"   Success Rate: {(passed/total_tests*100):.1f}%")
+    if dedupe:
+        logger.info(f"   Reused Results (identical input): {reused}")
+    logger.info(f"   Flaky Steps (passed after retry): {flaky_steps}")
+    logger.info(f"   Total Execution Time: {total_time:.2f} seconds")
+    if predicted_time is not None:
+        logger.info(f"   Predicted Time ({order} order): {predicted_time:.2f} seconds ({total_time - predicted_time:+.2f}s actual vs. predicted)")
+    logger.info(f"   Average Time per Test: {(total_time/total_tests):.2f} seconds")
+    logger.info(f"   Browser Restarts: {browsers.restarts}")
+    logger.info("=" * 80)
     
     return output_csv
 
+def run_all_tests(input_csv="test_cases.csv", order="file", retry_policies=None, history_db=DEFAULT_HISTORY_DB,
+                  collect_performance=False, **browser_options):
+    """Sync wrapper for run_all_tests_async; the whole suite shares one event loop"""
+    return asyncio.run(run_all_tests_async(input_csv, order, retry_policies, history_db, collect_performance,
+                                           **browser_options))
+
+def enqueue_test_cases(input_csv, queue_path, suite=None, order="file", workers=1, history_db=DEFAULT_HISTORY_DB):
+    """Add the CSV(s)' test cases to a shared job queue for worker.py to drain"""
+    test_cases = load_test_cases_from_csv(input_csv)
+    runnable = [test for test in test_cases if test['input']]
+    if len(runnable) < len(test_cases):
+        logger.info(f"⊘ Skipping {len(test_cases) - len(runnable)} test case(s) with no input")
+    
+    # Workers lease jobs in enqueue order, so the schedule is fixed here
+    runnable, _, _ = plan_schedule(runnable, order, workers, history_db=history_db)
+    
+    if suite is None:
+        first_csv = input_csv if isinstance(input_csv, str) else input_csv[0]
+        base_name = os.path.splitext(os.path.basename(first_csv))[0].replace('*', '')
+        suite = f"{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    
+    count = JobQueue(queue_path).enqueue(suite, runnable)
+    logger.info(f"📥 Enqueued {count} test case(s) into suite '{suite}' ({queue_path})")
+    logger.info(f"   Start workers with: python worker.py work {queue_path} --suite {suite}")
+    return suite
+
 if __name__ == "__main__":
-    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run the AI UI Tester suite from a CSV file")
+    parser.add_argument("input_csv", nargs="*", default=["test_cases.csv"], help="CSV files or globs, run in order")
+    parser.add_argument("--enqueue", metavar="QUEUE_DB", help="Add the test cases to a job queue instead of running them")
+    parser.add_argument("--suite", help="Suite name to enqueue under (default: derived from the CSV name)")
+    parser.add_argument("--order", choices=ORDERINGS, default="file",
+                        help="file: CSV order; lpt: longest first (parallel runs); priority: High/recently failing first")
+    parser.add_argument("--retry", action="store_true", help="Retry failed navigate/click/type/extract steps on the live page")
+    parser.add_argument("--max-step-attempts", type=int, help="Give navigate, click, type and extract steps up to this many attempts")
+    parser.add_argument("--history-db", default=DEFAULT_HISTORY_DB, help="Results history store to read and update")
+    parser.add_argument("--no-history", action="store_true", help="Do not record results in the history store")
+    parser.add_argument("--collect-perf", action="store_true", help="Record page performance metrics after navigate/click steps")
+    parser.add_argument("--workers", type=int, default=1, help="Workers expected to drain the queue (for the time prediction)")
+    parser.add_argument("--batch-dom", action="store_true",
+                        help="Run consecutive type/click steps in one page evaluation, falling back per step on failure")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Run each distinct input once and reuse its result for identical test cases")
+    parser.add_argument("--recycle-after", type=int, default=1,
+                        help="Share a browser across this many tests before replacing it (default: 1, fresh per test)")
+    parser.add_argument("--max-browser-mb", type=float, help="Replace the browser when it uses more memory than this")
+    parser.add_argument("--test-timeout", type=float, help="Error a test and restart the browser after this many seconds")
+    parser.add_argument("--log-level", help="Log level (default: LOG_LEVEL or INFO)")
+    parser.add_argument("--log-json", action="store_true", default=None, help="Emit JSON log lines")
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+    input_csv = args.input_csv
+    history_db = None if args.no_history else args.history_db
+    
+    logger.info(f"📂 Using input CSV: {', '.join(input_csv)}")
     
-    # Check if custom input CSV is provided
-    input_csv = sys.argv[1] if len(sys.argv) > 1 else "test_cases.csv"
+    if args.enqueue:
+        enqueue_test_cases(input_csv, args.enqueue, args.suite, args.order, args.workers, history_db)
+        raise SystemExit(0)
     
-    print(f"📂 Using input CSV: {input_csv}\n")
+    # Optional live metrics (METRICS_PORT / METRICS_SNAPSHOT_FILE)
+    start_from_env()
     
-    result_file = run_all_tests(input_csv)
+    retry_policies = resolve_retry_policies(max_attempts=args.max_step_attempts, retry=args.retry)
+    result_file = run_all_tests(input_csv, args.order, retry_policies, history_db, args.collect_perf,
+                                recycle_after=args.recycle_after, max_browser_mb=args.max_browser_mb,
+                                test_timeout=args.test_timeout, dedupe=args.dedupe,
+                                batch_dom_actions=args.batch_dom)
     
     if result_file:
-        print(f"\n✅ All tests completed!")
-        print(f"📊 Detailed results available in: {result_file}")
-        print(f"\n💡 Tip: Open the CSV file in Excel or Google Sheets for better visualization")
\ No newline at end of file
+        logger.info(f"✅ All tests completed!")
+        logger.info(f"📊 Detailed results available in: {result_file}")
+        logger.info(f"💡 Tip: Open the CSV file in Excel or Google Sheets for better visualization")
\ No newline at end of file
@@ -0,0 +1,181 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+ROOT_LOGGER = "aiuitester"
+
+# Payloads (page text, results dicts) are cut to this many characters
+DEFAULT_PAYLOAD_LIMIT = 300
+# Hard cap on a rendered log message
+DEFAULT_MAX_MESSAGE = 2000
+
+_test_id = contextvars.ContextVar("test_id", default=None)
+_step = contextvars.ContextVar("step", default=None)
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def truncate_payload(value, limit: int = DEFAULT_PAYLOAD_LIMIT) -> str:
+    """Render a value for logging, capped at `limit` characters"""
+    if isinstance(value, str):
+        text = value
+    else:
+        try:
+            text = json.dumps(value, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            text = repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text) - limit} more chars)"
+
+
+@contextmanager
+def log_context(test_id=None, step=None):
+    """Tag log records in this block (and tasks started from it) with a test ID / step"""
+    tokens = []
+    if test_id is not None:
+        tokens.append((_test_id, _test_id.set(test_id)))
+    if step is not None:
+        tokens.append((_step, _step.set(step)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current test ID / step onto the record in the emitting thread"""
+
+    def filter(self, record):
+        record.test_id = _test_id.get()
+        record.step = _step.get()
+        return True
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message
+
+    The stock prepare() folds the traceback into `msg`, where it would be
+    cut by the message length cap and missing from JSON's `exc` field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Render now: traceback objects keep every frame alive while queued
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines: time, level, [test step], message"""
+
+    def __init__(self, max_length: int = DEFAULT_MAX_MESSAGE):
+        super().__init__()
+        self.max_length = max_length
+
+    def format(self, record):
+        message = truncate_payload(record.getMessage(), self.max_length)
+        context = ""
+        if getattr(record, "test_id", None) is not None:
+            step = getattr(record, "step", None)
+            context = f"[{record.test_id}{'#' + str(step) if step is not None else ''}] "
+        line = f"{datetime.fromtimestamp(record.created).strftime('%H:%M:%S')} {record.levelname:<7} {context}{message}"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def __init__(self, max_length: int = DEFAULT_MAX_MESSAGE):
+        super().__init__()
+        self.max_length = max_length
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate_payload(record.getMessage(), self.max_length),
+        }
+        if getattr(record, "test_id", None) is not None:
+            entry["test_id"] = record.test_id
+        if getattr(record, "step", None) is not None:
+            entry["step"] = record.step
+        if getattr(record, "fields", None):
+            entry.update(record.fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=None, json_output=None, stream=None, max_length=None):
+    """Route the project's loggers through a queue to a background writer thread
+
+    For command-line entry points. When the package is embedded, leave it
+    uncalled and records propagate to the host application's handlers.
+    Defaults come from LOG_LEVEL (INFO), LOG_FORMAT ("text" or "json") and
+    LOG_MAX_LENGTH. Calling it again replaces the previous configuration.
+    """
+    global _listener
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    if json_output is None:
+        json_output = os.getenv("LOG_FORMAT", "text").lower() == "json"
+    max_length = max_length or int(os.getenv("LOG_MAX_LENGTH", DEFAULT_MAX_MESSAGE))
+
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter(max_length) if json_output else TextFormatter(max_length))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = ContextQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers[:] = [queue_handler]
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the project root; output is set up by configure_logging()"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
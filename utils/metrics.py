@@ -0,0 +1,268 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Latency buckets in seconds, tuned for browser actions and LLM calls
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    """Base class for a labelled metric family"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in items]
+
+    def snapshot(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [{"labels": dict(zip(self.labelnames, key)), "value": value} for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative histogram of observed values"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._values[key] = entry
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, dict(entry, counts=list(entry["counts"]))) for key, entry in self._values.items())
+        lines = []
+        for key, entry in items:
+            for bound, count in zip(self.buckets, entry["counts"]):
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': repr(float(bound))})} {count}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {entry['count']}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {entry['sum']}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {entry['count']}")
+        return lines
+
+    def snapshot(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+            return [
+                {
+                    "labels": dict(zip(self.labelnames, key)),
+                    "count": entry["count"],
+                    "sum": entry["sum"],
+                    "buckets": dict(zip([str(b) for b in self.buckets], entry["counts"])),
+                }
+                for key, entry in items
+            ]
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them for export"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serialisable view of all metrics"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "timestamp": time.time(),
+            "metrics": {metric.name: {"type": metric.kind, "values": metric.snapshot()} for metric in metrics},
+        }
+
+
+REGISTRY = MetricsRegistry()
+
+TESTS_TOTAL = REGISTRY.counter("aiuitester_tests_total", "Tests finished, by overall status", ("status",))
+STEPS_TOTAL = REGISTRY.counter("aiuitester_steps_total", "Steps executed, by action and status", ("action", "status"))
+PARSE_SECONDS = REGISTRY.histogram("aiuitester_parse_seconds", "Time spent parsing test instructions")
+ACTION_SECONDS = REGISTRY.histogram("aiuitester_action_seconds", "Time spent executing a step, by action", ("action",))
+STEP_RETRIES = REGISTRY.counter("aiuitester_step_retries_total", "Step attempts beyond the first, by action", ("action",))
+VALIDATE_SECONDS = REGISTRY.histogram("aiuitester_validate_seconds", "Time spent validating results")
+BROWSERS_OPEN = REGISTRY.gauge("aiuitester_browsers_open", "Browsers currently running")
+CONTEXTS_OPEN = REGISTRY.gauge("aiuitester_contexts_open", "Browser contexts currently open")
+PAGES_OPEN = REGISTRY.gauge("aiuitester_pages_open", "Pages open in managed browsers, at the last watchdog sample")
+BROWSER_RSS_BYTES = REGISTRY.gauge("aiuitester_browser_rss_bytes", "Resident memory of managed browsers, by process", ("process",))
+BROWSER_RECYCLES = REGISTRY.counter("aiuitester_browser_recycles_total", "Managed browsers replaced, by reason", ("reason",))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve /metrics on a background thread"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    logger.info(f"📈 Metrics available at http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def write_snapshot(path: str, registry: MetricsRegistry = REGISTRY):
+    """Atomically write a snapshot; `.prom` files get text format, anything else JSON"""
+    if path.endswith(".prom"):
+        content = registry.render_prometheus()
+    else:
+        content = json.dumps(registry.snapshot(), indent=2)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def start_snapshot_writer(path: str, interval: float = 15.0, registry: MetricsRegistry = REGISTRY) -> threading.Event:
+    """Write a snapshot every `interval` seconds; set the returned event to stop"""
+    stop = threading.Event()
+
+    def _loop():
+        while not stop.wait(interval):
+            try:
+                write_snapshot(path, registry)
+            except OSError as e:
+                logger.warning(f"⚠️  Could not write metrics snapshot: {e}")
+
+    thread = threading.Thread(target=_loop, name="metrics-snapshot", daemon=True)
+    thread.start()
+    atexit.register(lambda: stop.set() or write_snapshot(path, registry))
+    logger.info(f"📈 Writing metrics snapshot to {path} every {interval:g}s")
+    return stop
+
+
+def start_from_env():
+    """Start exporters configured via METRICS_PORT / METRICS_SNAPSHOT_FILE / METRICS_SNAPSHOT_INTERVAL"""
+    port = os.getenv("METRICS_PORT")
+    if port:
+        start_http_server(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+
+    snapshot_file = os.getenv("METRICS_SNAPSHOT_FILE")
+    if snapshot_file:
+        interval = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "15"))
+        start_snapshot_writer(snapshot_file, interval)
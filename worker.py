@@ -0,0 +1,172 @@
+from agents.executor import resolve_retry_policies
+from core.history import DEFAULT_HISTORY_DB, HistoryStore
+from core.job_queue import JobQueue
+from core.scheduler import ORDERINGS
+from core.workflow import run_test
+from test_cases_v2 import build_result_rows, build_error_row, write_results_csv, enqueue_test_cases
+from utils.metrics import TESTS_TOTAL, start_from_env
+from utils.logger import configure_logging, get_logger, log_context
+from datetime import datetime
+import argparse
+import os
+import socket
+import threading
+import time
+
+logger = get_logger("worker")
+
+
+def _keep_lease(queue, job_id, worker_id, stop):
+    """Renew the lease until `stop` is set so long tests are not handed to another worker"""
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.renew(job_id, worker_id):
+            logger.warning(f"⚠️  Lost lease on job {job_id}; another worker may pick it up")
+            return
+
+
+def run_job(queue, job, worker_id, retry_policies=None, collect_performance=False):
+    """Run one leased job and store its result rows"""
+    test = job['test_case']
+    logger.info(f"📋 [{worker_id}] {test['number']} - {test['name']} (attempt {job['attempts']})")
+    logger.info(f"   Input: {test['input']}")
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_keep_lease, args=(queue, job['id'], worker_id, stop), daemon=True)
+    heartbeat.start()
+
+    test_start_time = datetime.now()
+    try:
+        with log_context(test_id=test['number']):
+            report = run_test(test['input'], retry_policies=retry_policies,
+                              perf_budget=test.get('performance_budget'), collect_performance=collect_performance)
+        rows = build_result_rows(test, report, test_start_time, datetime.now())
+        logger.info(f"{'✅' if report.status in ['success', 'partial'] else '❌'} {test['number']}: {report.status}")
+    except Exception as e:
+        logger.error(f"❌ {test['number']}: {e}")
+        TESTS_TOTAL.inc(status="error")
+        rows = [build_error_row(test, e, test_start_time, datetime.now())]
+    finally:
+        stop.set()
+
+    if not queue.complete(job['id'], worker_id, rows):
+        logger.warning(f"⚠️  Job {job['id']} was already finished by another worker; result discarded")
+
+
+def default_output_csv(suite):
+    """Results file name for a suite, the same on every worker"""
+    return f"test_results_{suite}.csv"
+
+
+def export_results(queue, suite, output_csv=None, history_db=DEFAULT_HISTORY_DB):
+    """Write one consolidated results CSV for a suite"""
+    output_csv = output_csv or default_output_csv(suite)
+
+    csv_rows = []
+    for job in queue.finished_jobs(suite):
+        if job['result_rows']:
+            csv_rows.extend(job['result_rows'])
+        else:
+            # Abandoned after repeated lease expiry: record it instead of dropping it
+            start = datetime.fromtimestamp(job['started_at'] or job['enqueued_at'])
+            end = datetime.fromtimestamp(job['finished_at'] or time.time())
+            csv_rows.append(build_error_row(job['test_case'], RuntimeError(job['error']), start, end))
+
+    # Write to a private file and swap it in so readers never see a partial file
+    tmp_path = f"{output_csv}.{socket.gethostname()}.{os.getpid()}.tmp"
+    write_results_csv(csv_rows, tmp_path)
+    os.replace(tmp_path, output_csv)
+    if history_db:
+        # Runs are keyed by file, so re-exporting to the same path is a no-op here
+        HistoryStore(history_db).ingest_rows(output_csv, csv_rows)
+    logger.info(f"📄 Exported {len(csv_rows)} row(s) for suite '{suite}' to {output_csv}")
+    return output_csv
+
+
+def work(queue, worker_id, suite=None, output_csv=None, poll_interval=5.0, wait=True, retry_policies=None,
+         history_db=DEFAULT_HISTORY_DB, collect_performance=False):
+    """Lease and run jobs until the queue is drained"""
+    logger.info(f"👷 Worker {worker_id} draining {'suite ' + repr(suite) if suite else 'all suites'}")
+    completed = 0
+
+    while True:
+        job = queue.lease(worker_id, suite)
+        if job:
+            run_job(queue, job, worker_id, retry_policies, collect_performance)
+            completed += 1
+            continue
+
+        if queue.is_drained(suite) or not wait:
+            break
+
+        # Other workers still hold leases; wait in case one of them dies
+        time.sleep(poll_interval)
+
+    logger.info(f"🏁 Worker {worker_id} finished after {completed} job(s): {queue.counts(suite)}")
+    if suite and queue.is_drained(suite):
+        output_csv = output_csv or default_output_csv(suite)
+        # Every worker sees the suite drained; only the first to claim it exports
+        claim = queue.claim_export(suite, worker_id, output_csv)
+        if claim:
+            logger.info(f"📄 Suite '{suite}' already exported by {claim['worker']} to {claim['output']}")
+            return
+        try:
+            export_results(queue, suite, output_csv, history_db)
+        except Exception:
+            queue.release_export(suite, worker_id)
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed AI UI Tester worker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add CSV test cases to the queue")
+    enqueue_parser.add_argument("queue")
+    enqueue_parser.add_argument("input_csv", nargs="+", help="CSV files or globs")
+    enqueue_parser.add_argument("--suite")
+    enqueue_parser.add_argument("--order", choices=ORDERINGS, default="file")
+    enqueue_parser.add_argument("--workers", type=int, default=1, help="Expected worker count (for the time prediction)")
+    enqueue_parser.add_argument("--history-db", default=DEFAULT_HISTORY_DB)
+
+    work_parser = subparsers.add_parser("work", help="Lease and run jobs until the queue is drained")
+    work_parser.add_argument("queue")
+    work_parser.add_argument("--suite", help="Only drain this suite (required to export results)")
+    work_parser.add_argument("--output", help="Consolidated results CSV path")
+    work_parser.add_argument("--lease-seconds", type=float, default=300)
+    work_parser.add_argument("--poll-interval", type=float, default=5.0)
+    work_parser.add_argument("--no-wait", action="store_true", help="Exit as soon as nothing is leasable")
+    work_parser.add_argument("--history-db", default=DEFAULT_HISTORY_DB, help="Results history store to update on export")
+    work_parser.add_argument("--retry", action="store_true", help="Retry failed navigate/click/type/extract steps")
+    work_parser.add_argument("--max-step-attempts", type=int, help="Give navigate, click, type and extract steps up to this many attempts")
+    work_parser.add_argument("--collect-perf", action="store_true", help="Record page performance metrics")
+    work_parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+
+    status_parser = subparsers.add_parser("status", help="Show job counts per suite")
+    status_parser.add_argument("queue")
+
+    export_parser = subparsers.add_parser("export", help="Write a suite's results to CSV")
+    export_parser.add_argument("queue")
+    export_parser.add_argument("suite")
+    export_parser.add_argument("--output")
+    export_parser.add_argument("--history-db", default=DEFAULT_HISTORY_DB)
+
+    parser.add_argument("--log-level", help="Log level (default: LOG_LEVEL or INFO)")
+    parser.add_argument("--log-json", action="store_true", default=None, help="Emit JSON log lines")
+
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+
+    if args.command == "enqueue":
+        enqueue_test_cases(args.input_csv, args.queue, args.suite, args.order, args.workers, args.history_db)
+    elif args.command == "work":
+        start_from_env()
+        queue = JobQueue(args.queue, lease_seconds=args.lease_seconds)
+        retry_policies = resolve_retry_policies(max_attempts=args.max_step_attempts, retry=args.retry)
+        work(queue, args.worker_id, args.suite, args.output, args.poll_interval, wait=not args.no_wait,
+             retry_policies=retry_policies, history_db=args.history_db, collect_performance=args.collect_perf)
+    elif args.command == "status":
+        queue = JobQueue(args.queue)
+        for suite in queue.suites():
+            print(f"{suite}: {queue.counts(suite)}")
+    elif args.command == "export":
+        export_results(JobQueue(args.queue), args.suite, args.output, args.history_db)